@@ -0,0 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import signals
+from django.dispatch import receiver
+from . import models, deck, matchmaking, swipe_exclusions
+
+QUEUE_SIZE = 100
+SERVED_SIZE = 200
+REFILL_THRESHOLD = 20
+TIMEOUT = 60 * 60
+REFILL_GROUP = "swipe_refill"
+
+executor = ThreadPoolExecutor(max_workers=1)
+scheduled_ids = set()
+
+
+def get_key(profile_id):
+    return f"candidate_queue_{profile_id}"
+
+
+def get_served_key(profile_id):
+    return f"served_candidates_{profile_id}"
+
+
+def fill(profile):
+    if matchmaking.engine.is_loaded:
+        ids = matchmaking.engine.get_candidate_ids(profile, QUEUE_SIZE)
+    else:
+        ids = [candidate.pk for candidate in deck.get_deck(profile, QUEUE_SIZE, models.Profile.objects.only('elo'))]
+    cache.set(get_key(profile.pk), ids, TIMEOUT)
+    return ids
+
+
+def fill_in_background(profile_id):
+    try:
+        profile = models.Profile.objects.filter(pk=profile_id).first()
+        if profile:
+            fill(profile)
+    finally:
+        scheduled_ids.discard(profile_id)
+        close_old_connections()
+
+
+def schedule_fill(profile_id):
+    if profile_id not in scheduled_ids:
+        scheduled_ids.add(profile_id)
+        executor.submit(fill_in_background, profile_id)
+
+
+def pop(profile, size, exclude_ids=()):
+    ids = cache.get(get_key(profile.pk))
+    is_filled = not ids
+    if is_filled:
+        ids = fill(profile)
+
+    ids = [pk for pk in ids if pk not in exclude_ids]
+    batch, rest = ids[:size], ids[size:]
+    cache.set(get_key(profile.pk), rest, TIMEOUT)
+    if len(rest) < REFILL_THRESHOLD and not is_filled:
+        schedule_fill(profile.pk)
+
+    exclusions = swipe_exclusions.get(profile.pk)
+    candidates = models.Profile.objects.filter(deck.compatible_with(profile)).in_bulk(batch)
+    candidates = [
+        candidates[pk] for pk in batch
+        if pk in candidates and not swipe_exclusions.contains(exclusions, pk)
+    ]
+    if candidates:
+        served_ids = cache.get(get_served_key(profile.pk), [])
+        served_ids = served_ids + [candidate.pk for candidate in candidates]
+        cache.set(get_served_key(profile.pk), served_ids[-SERVED_SIZE:], TIMEOUT)
+    return candidates
+
+
+def is_served(profile_id, candidate_id):
+    return candidate_id in cache.get(get_served_key(profile_id), [])
+
+
+def invalidate(profile_id):
+    cache.delete_many([get_key(profile_id), get_served_key(profile_id)])
+
+
+def discard_swipes(swipes):
+    discarded_ids = {}
+    for (swiper_id, target_id), direction in swipes.items():
+        discarded_ids.setdefault(swiper_id, set()).add(target_id)
+        if direction == "left":
+            discarded_ids.setdefault(target_id, set()).add(swiper_id)
+
+    keys = {get_key(profile_id): ids for profile_id, ids in discarded_ids.items()}
+    keys.update({get_served_key(profile_id): ids for profile_id, ids in discarded_ids.items()})
+    queues = cache.get_many(keys)
+    cache.set_many({
+        key: [pk for pk in queue if pk not in keys[key]]
+        for key, queue in queues.items()
+    }, TIMEOUT)
+
+
+def broadcast_refill(profile):
+    event = {"type": "refill", "candidate": deck.get_candidate_summary(profile)}
+    transaction.on_commit(lambda: async_to_sync(get_channel_layer().group_send)(REFILL_GROUP, event))
+
+
+@receiver(models.swipes_recorded)
+def discard_on_swipe(sender, swipes, **kwargs):
+    discard_swipes(swipes)
+
+
+@receiver(signals.post_save, sender=models.Profile)
+def refill_on_create(sender, instance, created, **kwargs):
+    if created:
+        broadcast_refill(instance)
+
+
+@receiver(signals.post_delete, sender=models.Profile)
+def invalidate_on_delete(sender, instance, **kwargs):
+    invalidate(instance.pk)
@@ -1,13 +1,26 @@
 import json
+import asyncio
+import atexit
+import logging
+import threading
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
 from . import models
 from . import serializers
+from . import candidate_queues
+from . import deck
+from . import notifications
+from . import presence
+from .pagination import MessageCursorSerializer, paginate_messages
 
+logger = logging.getLogger(__name__)
 
-class ChatConsumer(AsyncWebsocketConsumer):
-    recipient_of = {}
 
+class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         user = self.scope.get("user")
         if not user or user.is_anonymous:
@@ -37,19 +50,28 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
         await self.channel_layer.group_add(self.message_group_name, self.channel_name)
         subprotocol = self.scope["subprotocols"][0]
-        self.recipient_of[self.sender_id] = self.recipient_id
+        await presence.enter(self.sender_id, self.recipient_id, self.channel_name)
+        self.heartbeat_task = asyncio.create_task(self.heartbeat())
         await self.accept(subprotocol=subprotocol)
 
         await self.reset_unread()
+        await self.send_history({
+            key: values[0] for key, values in parse_qs(self.scope["query_string"].decode()).items()
+        })
     
     async def disconnect(self, close_code):
-        if hasattr(self, "sender_id") and self.sender_id in self.recipient_of:
-            self.recipient_of.pop(self.sender_id)
+        if hasattr(self, "heartbeat_task"):
+            self.heartbeat_task.cancel()
+            await presence.leave(self.sender_id, self.channel_name)
         if hasattr(self, "message_group_name"):
             await self.channel_layer.group_discard(self.message_group_name, self.channel_name)
     
     async def receive(self, text_data):
         data: dict = json.loads(text_data or "{}")
+        if data.get("type") == "history":
+            await self.send_history(data)
+            return
+
         message = data.get("text", "").strip()
         if not message:
             return
@@ -63,15 +85,28 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 "payload": payload
             },
         )
-        
-        if self.recipient_of.get(self.recipient_id) != self.sender_id:
-            await self.recipient.anotify(
-                type="message",
-                id=self.sender_id
-            )
+
+    async def heartbeat(self):
+        while True:
+            await asyncio.sleep(presence.HEARTBEAT_INTERVAL)
+            await presence.heartbeat(self.sender_id, self.recipient_id, self.channel_name)
 
     async def message(self, event):
-        await self.send(text_data=json.dumps(event["payload"]))
+        await self.send(text_data=json.dumps({"type": "message", "message": event["payload"]}))
+
+    async def send_history(self, params):
+        cursor = MessageCursorSerializer(data=params)
+        if not cursor.is_valid():
+            await self.send(text_data=json.dumps({"type": "error", "errors": cursor.errors}))
+            return
+        messages, has_more = await self.get_history(cursor.validated_data)
+        await self.send(text_data=json.dumps({
+            "type": "history",
+            "messages": messages,
+            "has_more": has_more,
+            "before": cursor.validated_data.get("before"),
+            "after": cursor.validated_data.get("after"),
+        }))
     
     @database_sync_to_async
     def get_match(self):
@@ -80,17 +115,25 @@ class ChatConsumer(AsyncWebsocketConsumer):
         except models.Match.DoesNotExist:
             return None
 
+    @database_sync_to_async
+    def get_history(self, cursor):
+        messages, has_more = paginate_messages(models.Message.objects.filter(match=self.match), **cursor)
+        return serializers.MessageSerializer(messages, many=True).data, has_more
+
     @database_sync_to_async
     def create_message(self, text):
-        message = models.Message.objects.create(
-            sender=self.sender, recipient=self.recipient, text=text, match=self.match
-        )
+        is_recipient_away = presence.get_open_chat(self.recipient_id) != self.sender_id
+        with transaction.atomic():
+            message = models.Message.objects.create(
+                sender=self.sender, recipient=self.recipient, text=text, match=self.match
+            )
 
-        try:
-            self.match.last_notification_at = message.created_at
-            self.match.save(update_fields=['last_notification_at'])
-        except Exception:
-            pass
+            fields = {'last_notification_at': message.created_at}
+            if is_recipient_away:
+                unread_field = self.match.get_unread_field(self.recipient)
+                fields[unread_field] = F(unread_field) + 1
+                notifications.notify(self.recipient, "message", self.sender_id)
+            models.Match.objects.filter(pk=self.match.pk).update(**fields)
 
         return serializers.MessageSerializer(message).data
 
@@ -107,7 +150,77 @@ def get_profile(id):
         return None
 
 
+class SwipeBuffer:
+    max_size = 100
+    flush_interval = 1
+
+    def __init__(self):
+        self.swipes = {}
+        self.flush_handle = None
+        self.lock = asyncio.Lock()
+        self.swipes_lock = threading.Lock()
+        atexit.register(self.flush_sync)
+
+    def take(self):
+        with self.swipes_lock:
+            swipes, self.swipes = self.swipes, {}
+        return swipes
+
+    def restore(self, swipes):
+        with self.swipes_lock:
+            for pair, direction in self.swipes.items():
+                swipes.setdefault(pair, direction)
+            self.swipes = swipes
+
+    def get_target_ids(self, swiper_id):
+        with self.swipes_lock:
+            return {target_id for pending_swiper_id, target_id in self.swipes if pending_swiper_id == swiper_id}
+
+    async def add(self, swiper_id, target_id, direction):
+        with self.swipes_lock:
+            self.swipes.setdefault((swiper_id, target_id), direction)
+            size = len(self.swipes)
+        if size >= self.max_size:
+            await self.flush()
+        else:
+            self.schedule_flush()
+
+    def schedule_flush(self):
+        if not self.flush_handle:
+            self.flush_handle = asyncio.get_running_loop().call_later(
+                self.flush_interval, lambda: asyncio.ensure_future(self.flush())
+            )
+
+    async def flush(self):
+        if self.flush_handle:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        async with self.lock:
+            swipes = self.take()
+            if not swipes:
+                return
+            try:
+                await database_sync_to_async(models.Swipe.record_many)(swipes)
+            except Exception:
+                logger.exception("Failed to record %d buffered swipes, retrying.", len(swipes))
+                self.restore(swipes)
+                self.schedule_flush()
+
+    def flush_sync(self):
+        swipes = self.take()
+        if swipes:
+            models.Swipe.record_many(swipes)
+
+
+swipe_buffer = SwipeBuffer()
+
+
 class SwipeConsumer(AsyncWebsocketConsumer):
+    batch_size = 3 if settings.DEPLOY else 10
+    max_submit_size = 100
+    refill_group_name = candidate_queues.REFILL_GROUP
+    refill_delay = 2
+
     async def connect(self):
         user = self.scope.get("user")
         if not user or user.is_anonymous:
@@ -115,26 +228,83 @@ class SwipeConsumer(AsyncWebsocketConsumer):
             return
 
         self.profile = await get_profile(user.id)
+        if not self.profile:
+            await self.close(4401)
+            return
+        self.sent_ids = set()
+        self.deck_ids = set()
+        self.is_waiting = False
+        self.refill_task = None
         subprotocol = self.scope["subprotocols"][0]
         await self.accept(subprotocol=subprotocol)
+
+        await self.push_profiles(send_empty=True)
     
+    async def disconnect(self, close_code):
+        if getattr(self, "is_waiting", False):
+            await self.channel_layer.group_discard(self.refill_group_name, self.channel_name)
+        if getattr(self, "refill_task", None):
+            self.refill_task.cancel()
+        await swipe_buffer.flush()
+
     async def receive(self, text_data):
         data: dict = json.loads(text_data or "{}")
-        other_id = data["id"]
-        direction = data["direction"]
-        await self.swipe(other_id, direction)
-        
+        if data.get("type") == "swipes":
+            serializer = serializers.SwipeSerializer(
+                data=data.get("swipes"), many=True, allow_empty=False, max_length=self.max_submit_size
+            )
+            if not serializer.is_valid():
+                await self.send(text_data=json.dumps({"type": "error", "errors": serializer.errors}))
+                return
+            results = await self.submit_swipes(serializer.validated_data)
+            await self.send(text_data=json.dumps({"type": "swipe_results", "results": results}))
+            self.deck_ids -= {result["id"] for result in results}
+        else:
+            other_id = data.get("id")
+            direction = data.get("direction")
+            if not isinstance(other_id, int) or direction not in ("left", "right"):
+                return
+            await swipe_buffer.add(self.profile.pk, other_id, direction)
+            self.deck_ids.discard(other_id)
+
+        if len(self.deck_ids) <= 1:
+            await self.push_profiles()
+
+    async def refill(self, event):
+        if self.deck_ids or not deck.is_compatible(self.profile, event["candidate"]):
+            return
+        if self.refill_task is None or self.refill_task.done():
+            self.refill_task = asyncio.create_task(self.refill_later())
+
+    async def refill_later(self):
+        await asyncio.sleep(self.refill_delay)
+        if not self.deck_ids:
+            await self.push_profiles()
+
+    async def push_profiles(self, send_empty=False):
+        profiles = await self.get_profiles()
+        if profiles or send_empty:
+            await self.send(text_data=json.dumps({"type": "profiles", "profiles": profiles}))
+
+        is_waiting = not self.deck_ids
+        if is_waiting and not self.is_waiting:
+            await self.channel_layer.group_add(self.refill_group_name, self.channel_name)
+        elif not is_waiting and self.is_waiting:
+            await self.channel_layer.group_discard(self.refill_group_name, self.channel_name)
+        self.is_waiting = is_waiting
+
     @database_sync_to_async
-    def swipe(self, other_id, direction):
-        try:
-            other = models.Profile.objects.get(user_id=other_id)
-            if (
-                not self.profile.right_swiped.filter(user_id=other_id).exists()
-                and not self.profile.left_swiped.filter(user_id=other_id).exists()
-            ):
-                self.profile.swipe(other, direction)
-        except models.Profile.DoesNotExist:
-            pass
+    def submit_swipes(self, swipes):
+        return models.Swipe.submit(self.profile.pk, swipes)
+
+    @database_sync_to_async
+    def get_profiles(self):
+        self.profile.refresh_from_db()
+        profiles = candidate_queues.pop(self.profile, self.batch_size, self.sent_ids)
+        ids = {profile.pk for profile in profiles}
+        self.sent_ids |= ids
+        self.deck_ids |= ids
+        return serializers.ProfileSerializer(profiles, many=True, context={'user': self.scope["user"]}).data
 
 
 class NotificationConsumer(AsyncWebsocketConsumer):
@@ -158,6 +328,7 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             await self.channel_layer.group_discard(self.notification_group_name, self.channel_name)
     
     async def notification(self, event):
-        payload = event["payload"].copy()
-        payload["type"] = payload.pop("notification_type")
-        await self.send(text_data=json.dumps(payload))
+        for payload in event["payloads"]:
+            payload = payload.copy()
+            payload["type"] = payload.pop("notification_type")
+            await self.send(text_data=json.dumps(payload))
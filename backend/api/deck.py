@@ -0,0 +1,101 @@
+from datetime import date
+from django.db import connection
+from django.db.models import Q
+from . import models, swipe_exclusions
+
+CANDIDATE_DATE_FIELDS = ("birth_date", "youngest_preferred_birth_date", "oldest_preferred_birth_date")
+
+
+def compatible_with(profile):
+    return (
+        ~Q(user=profile.user_id)
+        & Q(compatibility_bucket__in=profile.get_compatible_buckets())
+
+        & Q(birth_date__lte=profile.youngest_preferred_birth_date)
+        & Q(birth_date__gte=profile.oldest_preferred_birth_date)
+
+        & Q(youngest_preferred_birth_date__gte=profile.birth_date)
+        & Q(oldest_preferred_birth_date__lte=profile.birth_date)
+    )
+
+
+def get_candidate_summary(profile):
+    return {
+        "id": profile.pk,
+        "compatibility_bucket": profile.compatibility_bucket,
+        **{field: getattr(profile, field).isoformat() for field in CANDIDATE_DATE_FIELDS},
+    }
+
+
+def is_compatible(profile, candidate):
+    birth_date, youngest_preferred_birth_date, oldest_preferred_birth_date = (
+        date.fromisoformat(candidate[field]) for field in CANDIDATE_DATE_FIELDS
+    )
+    return (
+        candidate["id"] != profile.pk
+        and candidate["compatibility_bucket"] in profile.get_compatible_buckets()
+        and profile.oldest_preferred_birth_date <= birth_date <= profile.youngest_preferred_birth_date
+        and oldest_preferred_birth_date <= profile.birth_date <= youngest_preferred_birth_date
+    )
+
+
+def fetch_candidates(profile, size, queryset=None):
+    queryset = models.Profile.objects.all() if queryset is None else queryset
+    exclusions = swipe_exclusions.get(profile.pk)
+    candidates = queryset.filter(compatible_with(profile))
+    higher = candidates.filter(elo__gte=profile.elo).order_by('elo', 'user')
+    lower = candidates.filter(elo__lt=profile.elo).order_by('-elo', 'user')
+
+    if connection.features.supports_slicing_ordering_in_compound:
+        rows = list(higher[:size].union(lower[:size], all=True))
+        higher_page = sorted((p for p in rows if p.elo >= profile.elo), key=lambda p: (p.elo, p.pk))
+        lower_page = sorted((p for p in rows if p.elo < profile.elo), key=lambda p: (-p.elo, p.pk))
+    else:
+        higher_page, lower_page = list(higher[:size]), list(lower[:size])
+
+    return (
+        fill_leg(higher, higher_page, size, exclusions, lambda p: Q(elo__gt=p.elo) | Q(elo=p.elo, user__gt=p.pk)),
+        fill_leg(lower, lower_page, size, exclusions, lambda p: Q(elo__lt=p.elo) | Q(elo=p.elo, user__gt=p.pk)),
+    )
+
+
+def fill_leg(leg, page, size, exclusions, after):
+    leg_candidates = [p for p in page if not swipe_exclusions.contains(exclusions, p.pk)]
+    limit = size
+    while len(page) == limit and len(leg_candidates) < size:
+        limit *= 2
+        page = list(leg.filter(after(page[-1]))[:limit])
+        leg_candidates += [p for p in page if not swipe_exclusions.contains(exclusions, p.pk)]
+    return leg_candidates[:size]
+
+
+def merge_by_distance(elo, higher, lower, size):
+    deck = []
+    i_higher = 0
+    i_lower = 0
+
+    while len(deck) < size:
+        if i_higher < len(higher) and i_lower < len(lower):
+            higher_diff = abs(higher[i_higher].elo - elo)
+            lower_diff = abs(lower[i_lower].elo - elo)
+            if higher_diff <= lower_diff:
+                deck.append(higher[i_higher])
+                i_higher += 1
+            else:
+                deck.append(lower[i_lower])
+                i_lower += 1
+        elif i_higher < len(higher):
+            deck.append(higher[i_higher])
+            i_higher += 1
+        elif i_lower < len(lower):
+            deck.append(lower[i_lower])
+            i_lower += 1
+        else:
+            break
+
+    return deck
+
+
+def get_deck(profile, size, queryset=None):
+    higher, lower = fetch_candidates(profile, size, queryset)
+    return merge_by_distance(profile.elo, higher, lower, size)
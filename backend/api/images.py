@@ -0,0 +1,32 @@
+import io
+from PIL import Image, ImageOps
+
+ENCODERS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+
+def verify(file):
+    with Image.open(file) as image:
+        image.verify()
+    file.seek(0)
+
+
+def render(data, sizes, formats):
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+
+    derivatives = {}
+    for size, bounds in sizes.items():
+        if size == "avatar":
+            resized = ImageOps.fit(image, bounds, Image.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail(bounds, Image.LANCZOS)
+        for format in formats:
+            encoder, options = ENCODERS[format]
+            buffer = io.BytesIO()
+            resized.save(buffer, encoder, **options)
+            derivatives[f"{size}_{format}"] = buffer.getvalue()
+    return derivatives
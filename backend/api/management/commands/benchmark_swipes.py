@@ -0,0 +1,134 @@
+import json
+import random
+import statistics
+import subprocess
+import time
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from api import models, deck, matchmaking, candidate_queues, swipe_exclusions
+from api.views import SwipeView
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(latencies, query_counts):
+    latencies_ms = [latency * 1000 for latency in latencies]
+    if len(latencies_ms) > 1:
+        percentiles = statistics.quantiles(latencies_ms, n=100, method="inclusive")
+    else:
+        percentiles = latencies_ms * 99
+    return {
+        "samples": len(latencies_ms),
+        "mean_ms": statistics.fmean(latencies_ms),
+        "p50_ms": percentiles[49],
+        "p95_ms": percentiles[94],
+        "p99_ms": percentiles[98],
+        "max_ms": max(latencies_ms),
+        "mean_queries": statistics.fmean(query_counts),
+    }
+
+
+def measure(function, arguments):
+    latencies = []
+    query_counts = []
+    for argument in arguments:
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            function(argument)
+            latencies.append(time.perf_counter() - start)
+        query_counts.append(len(queries.captured_queries))
+    return summarize(latencies, query_counts)
+
+
+class Command(BaseCommand):
+    help = "Measure deck latency and swipe write throughput on the configured database and write the results as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--samples", type=int, default=200)
+        parser.add_argument("--swipes", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default="benchmark.json")
+
+    def handle(self, *args, samples, swipes, seed, output, **options):
+        if samples < 2:
+            raise CommandError("--samples must be at least 2.")
+        random.seed(seed)
+        profile_ids = list(models.Profile.objects.values_list('pk', flat=True))
+        if len(profile_ids) < 2:
+            self.stderr.write("Not enough profiles. Run generate_population first.")
+            return
+        profiles = list(models.Profile.objects.filter(pk__in=random.sample(profile_ids, min(samples, len(profile_ids)))))
+        size = SwipeView.batch_size
+
+        results = {
+            "commit": get_commit(),
+            "database": connection.vendor,
+            "profiles": len(profile_ids),
+            "swipes": models.Swipe.objects.count(),
+            "deck_size": size,
+            "deck": {},
+            "swipe_writes": {},
+        }
+
+        cache.delete_many([swipe_exclusions.get_key(profile.pk) for profile in profiles])
+        results["deck"]["sql_cold"] = measure(lambda profile: deck.get_deck(profile, size), profiles)
+        results["deck"]["sql_warm"] = measure(lambda profile: deck.get_deck(profile, size), profiles)
+
+        if matchmaking.engine.is_enabled:
+            start = time.perf_counter()
+            matchmaking.engine.load()
+            results["deck"]["memory_load_s"] = time.perf_counter() - start
+            results["deck"]["memory"] = measure(
+                lambda profile: matchmaking.engine.get_candidate_ids(profile, size), profiles
+            )
+
+        cache.delete_many([candidate_queues.get_key(profile.pk) for profile in profiles])
+        results["deck"]["queue_fill"] = measure(lambda profile: candidate_queues.pop(profile, size), profiles)
+        results["deck"]["queue_pop"] = measure(lambda profile: candidate_queues.pop(profile, size), profiles)
+
+        pairs = {}
+        while len(pairs) < swipes:
+            swiper_id, target_id = random.sample(profile_ids, 2)
+            pairs[swiper_id, target_id] = random.choice(("left", "right"))
+
+        with transaction.atomic():
+            profiles_by_id = models.Profile.objects.in_bulk({pk for pair in list(pairs)[:samples] for pk in pair})
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                for (swiper_id, target_id), direction in list(pairs.items())[:samples]:
+                    profiles_by_id[swiper_id].swipe(profiles_by_id[target_id], direction)
+            elapsed = time.perf_counter() - start
+            results["swipe_writes"]["single"] = {
+                "swipes": min(samples, len(pairs)),
+                "swipes_per_second": min(samples, len(pairs)) / elapsed,
+                "queries_per_swipe": len(queries.captured_queries) / min(samples, len(pairs)),
+            }
+            transaction.set_rollback(True)
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                batch = list(pairs.items())
+                for i in range(0, len(batch), 100):
+                    models.Swipe.record_many(dict(batch[i:i + 100]))
+            elapsed = time.perf_counter() - start
+            results["swipe_writes"]["buffered"] = {
+                "swipes": len(pairs),
+                "swipes_per_second": len(pairs) / elapsed,
+                "queries_per_swipe": len(queries.captured_queries) / len(pairs),
+            }
+            transaction.set_rollback(True)
+
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(json.dumps(results, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {output}."))
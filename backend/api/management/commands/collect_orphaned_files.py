@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from api import photos
+
+
+class Command(BaseCommand):
+    help = "Delete files of removed photos that are no longer referenced. Run periodically."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = photos.collect_garbage(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} orphaned files."))
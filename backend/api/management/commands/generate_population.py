@@ -0,0 +1,138 @@
+import io
+import random
+from datetime import date, timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from PIL import Image
+from api import models
+from api.storage import photo_storage
+
+FIRST_NAMES = ("lea", "noah", "mia", "luca", "emma", "elias", "lina", "leon", "sara", "jan")
+LAST_NAMES = ("muller", "meier", "schmid", "keller", "weber", "huber", "schneider", "frei", "brunner", "baumann")
+SCHOOLS = ("mng", "rgzh", "lgr", "ksstadelhofen", "ksh", "kshp")
+
+
+def get_placeholder_photo():
+    buffer = io.BytesIO()
+    Image.new("RGB", (600, 800), (200, 200, 200)).save(buffer, "JPEG")
+    return photo_storage.save("photos/placeholder.jpg", ContentFile(buffer.getvalue()))
+
+
+def random_gender():
+    return random.choices(models.GENDERS, weights=(48, 48, 4))[0]
+
+
+def random_sexual_preference(gender):
+    opposite = {"male": "female", "female": "male"}.get(gender, "all")
+    same = gender if gender in models.SEXUAL_PREFERENCES else "all"
+    return random.choices((opposite, same, "all"), weights=(85, 8, 7))[0]
+
+
+class Command(BaseCommand):
+    help = "Bulk-insert a synthetic population of profiles, photos, swipes and matches. Run against a scratch database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("count", type=int)
+        parser.add_argument("--swipes-per-profile", type=int, default=50)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, count, swipes_per_profile, batch_size, seed, **options):
+        random.seed(seed)
+        password = make_password(None)
+        photo = get_placeholder_photo()
+        with photo_storage.open(photo) as f:
+            content_hash = models.get_content_hash(f)
+        today = date.today()
+        first_id = (models.User.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+        new_ids = []
+
+        for start in range(0, count, batch_size):
+            size = min(batch_size, count - start)
+            with transaction.atomic():
+                users = []
+                names = []
+                for i in range(first_id + start, first_id + start + size):
+                    first_name, last_name = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+                    names.append((first_name.capitalize(), last_name.capitalize()))
+                    users.append(models.User(
+                        username=f"synthetic{i}",
+                        email=f"{first_name}.{last_name}{i}@{random.choice(SCHOOLS)}.ch",
+                        password=password,
+                        is_email_verified=True,
+                        accepted_tos=True,
+                    ))
+                users = models.User.objects.bulk_create(users)
+                new_ids += [user.pk for user in users]
+
+                profiles = []
+                for user, (first_name, last_name) in zip(users, names):
+                    birth_date = today - timedelta(days=random.randint(14 * 365 + 4, 20 * 365))
+                    younger_age_diff = -random.randint(0, 2)
+                    older_age_diff = random.randint(0, 2)
+                    gender = random_gender()
+                    sexual_preference = random_sexual_preference(gender)
+                    profiles.append(models.Profile(
+                        user=user,
+                        first_name=first_name,
+                        last_name=last_name,
+                        bio="",
+                        birth_date=birth_date,
+                        gender=gender,
+                        sexual_preference=sexual_preference,
+                        compatibility_bucket=models.Profile.get_compatibility_bucket(gender, sexual_preference),
+                        younger_age_diff=younger_age_diff,
+                        older_age_diff=older_age_diff,
+                        elo=round(random.gauss(0, 100)),
+                        swiped_on_count=random.randint(0, 2 * swipes_per_profile),
+                        **models.Profile.get_preferred_birth_dates(birth_date, younger_age_diff, older_age_diff),
+                    ))
+                models.Profile.objects.bulk_create(profiles)
+                models.Photo.objects.bulk_create(
+                    [models.Photo(profile_id=user.pk, image=photo, content_hash=content_hash) for user in users]
+                )
+                photo_storage.add_reference(photo, len(users))
+            self.stdout.write(f"Created {start + size}/{count} profiles.")
+
+        profile_ids = list(models.Profile.objects.values_list('pk', flat=True))
+        for start in range(0, len(new_ids), batch_size):
+            swipes = {}
+            for swiper_id in new_ids[start:start + batch_size]:
+                for target_id in random.sample(profile_ids, min(swipes_per_profile, len(profile_ids))):
+                    if target_id != swiper_id:
+                        swipes[swiper_id, target_id] = random.choices(("left", "right"), weights=(65, 35))[0]
+
+            right_pairs = {pair for pair, direction in swipes.items() if direction == "right"}
+            existing_right_pairs = set(
+                models.Swipe.objects
+                .filter(direction="right", target_id__in=new_ids[start:start + batch_size])
+                .values_list('swiper_id', 'target_id')
+            )
+            matched_pairs = {
+                tuple(sorted((swiper_id, target_id)))
+                for swiper_id, target_id in right_pairs
+                if (target_id, swiper_id) in right_pairs or (target_id, swiper_id) in existing_right_pairs
+            }
+
+            with transaction.atomic():
+                models.Swipe.objects.bulk_create(
+                    [
+                        models.Swipe(swiper_id=swiper_id, target_id=target_id, direction=direction)
+                        for (swiper_id, target_id), direction in swipes.items()
+                    ],
+                    batch_size=batch_size,
+                    ignore_conflicts=True,
+                )
+                models.Match.objects.bulk_create(
+                    [
+                        models.Match(profile1_id=profile1_id, profile2_id=profile2_id)
+                        for profile1_id, profile2_id in matched_pairs
+                    ],
+                    batch_size=batch_size,
+                    ignore_conflicts=True,
+                )
+            self.stdout.write(f"Created swipe histories for {min(start + batch_size, len(new_ids))}/{len(new_ids)} profiles.")
+
+        self.stdout.write(self.style.SUCCESS(f"Generated {count} profiles."))
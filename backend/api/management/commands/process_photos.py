@@ -0,0 +1,55 @@
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from api import models, images, photos
+
+
+class Command(BaseCommand):
+    help = "Generate photo derivatives for existing photos in a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count())
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--all", dest="regenerate", action="store_true", help="Also regenerate photos that already have derivatives.")
+
+    def handle(self, *args, workers, batch_size, regenerate, **options):
+        queryset = models.Photo.objects.order_by('pk')
+        if not regenerate:
+            queryset = queryset.filter(Q(full_jpeg="") | Q(status="processing"))
+        photo_ids = list(queryset.values_list('pk', flat=True))
+        processed = 0
+        failed = 0
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for start in range(0, len(photo_ids), batch_size):
+                photos_by_hash = defaultdict(list)
+                for photo in models.Photo.objects.filter(pk__in=photo_ids[start:start + batch_size]):
+                    photos_by_hash[photo.content_hash].append(photo)
+
+                futures = {}
+                for batch in photos_by_hash.values():
+                    try:
+                        data = photos.read(batch[0])
+                    except OSError as e:
+                        failed += len(batch)
+                        self.stderr.write(f"Skipped photos {[photo.pk for photo in batch]}: {e}")
+                        continue
+                    futures[pool.submit(images.render, data, models.PHOTO_SIZES, models.PHOTO_FORMATS)] = batch
+
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    try:
+                        derivatives = future.result()
+                    except photos.PROCESSING_ERRORS as e:
+                        failed += len(batch)
+                        self.stderr.write(f"Skipped photos {[photo.pk for photo in batch]}: {e}")
+                        continue
+                    for photo in batch:
+                        photos.save_derivatives(photo, derivatives)
+                    processed += len(batch)
+                self.stdout.write(f"Processed {processed + failed}/{len(photo_ids)} photos.")
+
+        self.stdout.write(self.style.SUCCESS(f"Generated derivatives for {processed} photos, {failed} failed."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from api import models, candidate_queues
+
+
+class Command(BaseCommand):
+    help = "Recompute the cached candidate queue of every profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = 0
+        for profile in models.Profile.objects.iterator(chunk_size=options["chunk_size"]):
+            candidate_queues.fill(profile)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Refilled {count} candidate queues."))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api import models
+from api.storage import photo_storage, is_content_addressed
+
+
+class Command(BaseCommand):
+    help = "Move existing photo files into content-addressed storage and queue the old copies for garbage collection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, chunk_size, **options):
+        fields = ['image', *models.PHOTO_DERIVATIVES]
+        rehomed_names = {}
+        moved = 0
+
+        for photo in models.Photo.objects.only(*fields).iterator(chunk_size=chunk_size):
+            updates = {}
+            for field in fields:
+                name = getattr(photo, field).name
+                if not name or is_content_addressed(name):
+                    continue
+                if name in rehomed_names:
+                    photo_storage.add_reference(rehomed_names[name])
+                else:
+                    try:
+                        with photo_storage.open(name) as f:
+                            rehomed_names[name] = photo_storage.save(name, f)
+                    except FileNotFoundError:
+                        self.stderr.write(f"Skipped missing file {name} of photo {photo.pk}.")
+                        continue
+                updates[field] = rehomed_names[name]
+
+            if updates:
+                with transaction.atomic():
+                    models.Photo.objects.filter(pk=photo.pk).update(**updates)
+                    models.OrphanedFile.objects.bulk_create(
+                        [models.OrphanedFile(name=getattr(photo, field).name) for field in updates]
+                    )
+                moved += len(updates)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-homed {moved} file references into {len(set(rehomed_names.values()))} stored files. "
+            "Run collect_orphaned_files to delete the old copies."
+        ))
@@ -0,0 +1,35 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api import ratings
+
+
+class Command(BaseCommand):
+    help = "Replay the swipes logged since the last rating period and write the new Elo ratings. Use --full to recompute every rating from the whole swipe log."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true")
+        parser.add_argument("--period-hours", type=float, default=24)
+        parser.add_argument("--chunk-size", type=int, default=ratings.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if not settings.ELO_RATING_PERIODS:
+            raise CommandError(
+                "ELO_RATING_PERIODS is disabled, so ratings are already updated on every swipe "
+                "and a replay would race those updates."
+            )
+
+        try:
+            if options["full"]:
+                swipe_count, updated_count = ratings.recompute(
+                    timedelta(hours=options["period_hours"]), options["chunk_size"]
+                )
+            else:
+                result = ratings.run_period(options["chunk_size"])
+                if result is None:
+                    self.stdout.write("No new swipes.")
+                    return
+                swipe_count, updated_count = result
+        except ratings.RatingPeriodInProgress:
+            raise CommandError("Another rating period is already running.")
+        self.stdout.write(self.style.SUCCESS(f"Replayed {swipe_count} swipes and updated {updated_count} profiles."))
@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import signals
+from django.dispatch import receiver
+from . import models
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FIELDS = ('pk', 'elo', 'birth_date', 'oldest_preferred_birth_date', 'youngest_preferred_birth_date', 'compatibility_bucket')
+ARRAYS = ('ids', 'elos', 'birth_dates', 'oldest_preferred', 'youngest_preferred', 'buckets')
+ELO_VERSION_KEY = "matchmaking_elo_version"
+
+
+def bump_elo_version():
+    cache.set(ELO_VERSION_KEY, time.time_ns(), None)
+
+
+class MatchmakingEngine:
+    reload_interval = 10 * 60
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.is_loaded = False
+        self.is_loading = False
+        self.loaded_at = 0
+
+    @property
+    def is_enabled(self):
+        return np is not None and settings.IN_MEMORY_MATCHMAKING
+
+    def start(self):
+        if self.is_enabled and not self.is_loading:
+            self.is_loading = True
+            threading.Thread(target=self.load, daemon=True).start()
+
+    def load(self):
+        try:
+            elo_version = cache.get(ELO_VERSION_KEY)
+            rows = list(models.Profile.objects.order_by('pk').values_list(*FIELDS))
+            excluded_ids = defaultdict(list)
+            for swiper_id, target_id, direction in models.Swipe.objects.values_list('swiper_id', 'target_id', 'direction').iterator():
+                excluded_ids[swiper_id].append(target_id)
+                if direction == "left":
+                    excluded_ids[target_id].append(swiper_id)
+
+            with self.lock:
+                self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+                self.elos = np.array([row[1] for row in rows], dtype=np.int64)
+                self.birth_dates = np.array([row[2].toordinal() for row in rows], dtype=np.int32)
+                self.oldest_preferred = np.array([row[3].toordinal() for row in rows], dtype=np.int32)
+                self.youngest_preferred = np.array([row[4].toordinal() for row in rows], dtype=np.int32)
+                self.buckets = np.array([row[5] for row in rows], dtype=np.int16)
+                self.excluded_ids = {
+                    profile_id: np.unique(np.array(ids, dtype=np.int64))
+                    for profile_id, ids in excluded_ids.items()
+                }
+                self.elo_version = elo_version
+                self.is_loaded = True
+                self.loaded_at = time.monotonic()
+        finally:
+            self.is_loading = False
+            close_old_connections()
+
+    def index_of(self, profile_id):
+        i = np.searchsorted(self.ids, profile_id)
+        return i if i < len(self.ids) and self.ids[i] == profile_id else None
+
+    def refresh_elos(self, elo_version):
+        rows = list(models.Profile.objects.order_by('pk').values_list('pk', 'elo'))
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        elos = np.array([row[1] for row in rows], dtype=np.int64)
+        with self.lock:
+            if len(self.ids):
+                positions = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+                found = self.ids[positions] == ids
+                self.elos[positions[found]] = elos[found]
+            self.elo_version = elo_version
+
+    def get_candidate_ids(self, profile, size):
+        if time.monotonic() - self.loaded_at > self.reload_interval:
+            self.start()
+        # Rating periods rewrite elos with bulk updates that send no signals
+        elo_version = cache.get(ELO_VERSION_KEY)
+        if elo_version != self.elo_version:
+            self.refresh_elos(elo_version)
+
+        with self.lock:
+            if not len(self.ids):
+                return []
+            mask = (
+                np.isin(self.buckets, profile.get_compatible_buckets())
+                & (self.birth_dates >= profile.oldest_preferred_birth_date.toordinal())
+                & (self.birth_dates <= profile.youngest_preferred_birth_date.toordinal())
+                & (self.oldest_preferred <= profile.birth_date.toordinal())
+                & (self.youngest_preferred >= profile.birth_date.toordinal())
+                & (self.ids != profile.pk)
+            )
+            excluded_ids = self.excluded_ids.get(profile.pk)
+            if excluded_ids is not None:
+                positions = np.minimum(np.searchsorted(self.ids, excluded_ids), len(self.ids) - 1)
+                mask[positions[self.ids[positions] == excluded_ids]] = False
+
+            indices = np.flatnonzero(mask)
+            if not len(indices):
+                return []
+            diffs = self.elos[indices] - profile.elo
+            keys = ((np.abs(diffs) * 2 + (diffs < 0)) * (int(self.ids[-1]) + 1)) + self.ids[indices]
+            if len(keys) > size:
+                nearest = np.argpartition(keys, size - 1)[:size]
+                keys, indices = keys[nearest], indices[nearest]
+            return self.ids[indices[np.argsort(keys)]].tolist()
+
+    def update_profile(self, profile):
+        with self.lock:
+            values = (
+                profile.pk,
+                profile.elo,
+                profile.birth_date.toordinal(),
+                profile.oldest_preferred_birth_date.toordinal(),
+                profile.youngest_preferred_birth_date.toordinal(),
+                profile.compatibility_bucket,
+            )
+            i = self.index_of(profile.pk)
+            if i is None:
+                i = np.searchsorted(self.ids, profile.pk)
+                for name, value in zip(ARRAYS, values):
+                    setattr(self, name, np.insert(getattr(self, name), i, value))
+            else:
+                for name, value in zip(ARRAYS, values):
+                    getattr(self, name)[i] = value
+
+    def remove_profile(self, profile_id):
+        with self.lock:
+            i = self.index_of(profile_id)
+            if i is not None:
+                for name in ARRAYS:
+                    setattr(self, name, np.delete(getattr(self, name), i))
+            self.excluded_ids.pop(profile_id, None)
+
+    def record_swipes(self, swipes):
+        elos = list(models.Profile.objects.filter(pk__in={target_id for _, target_id in swipes}).values_list('pk', 'elo'))
+        with self.lock:
+            for (swiper_id, target_id), direction in swipes.items():
+                self.exclude(swiper_id, target_id)
+                if direction == "left":
+                    self.exclude(target_id, swiper_id)
+            for profile_id, elo in elos:
+                i = self.index_of(profile_id)
+                if i is not None:
+                    self.elos[i] = elo
+
+    def exclude(self, profile_id, excluded_id):
+        excluded_ids = self.excluded_ids.get(profile_id, np.empty(0, dtype=np.int64))
+        i = np.searchsorted(excluded_ids, excluded_id)
+        if i == len(excluded_ids) or excluded_ids[i] != excluded_id:
+            self.excluded_ids[profile_id] = np.insert(excluded_ids, i, excluded_id)
+
+
+engine = MatchmakingEngine()
+
+
+@receiver(signals.post_save, sender=models.Profile)
+def update_engine_on_save(sender, instance, **kwargs):
+    if engine.is_loaded:
+        engine.update_profile(instance)
+
+
+@receiver(signals.post_delete, sender=models.Profile)
+def update_engine_on_delete(sender, instance, **kwargs):
+    if engine.is_loaded:
+        engine.remove_profile(instance.pk)
+
+
+@receiver(models.swipes_recorded)
+def update_engine_on_swipe(sender, swipes, **kwargs):
+    if engine.is_loaded:
+        engine.record_swipes(swipes)
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:00
+
+from datetime import date
+from django.db import migrations, models
+
+
+def add_years(birth_date, delta_years):
+    try:
+        return birth_date.replace(year=birth_date.year + delta_years)
+    except ValueError:
+        return date(birth_date.year + delta_years, 3, 1)
+
+
+def backfill_preferred_birth_dates(apps, schema_editor):
+    Profile = apps.get_model('api', 'Profile')
+    profiles = list(Profile.objects.only('birth_date', 'younger_age_diff', 'older_age_diff'))
+    for profile in profiles:
+        profile.oldest_preferred_birth_date = add_years(profile.birth_date, -profile.older_age_diff)
+        profile.youngest_preferred_birth_date = add_years(profile.birth_date, -profile.younger_age_diff)
+    Profile.objects.bulk_update(
+        profiles,
+        ['oldest_preferred_birth_date', 'youngest_preferred_birth_date'],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0047_alter_match_options_alter_match_last_notification_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='oldest_preferred_birth_date',
+            field=models.DateField(db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='youngest_preferred_birth_date',
+            field=models.DateField(db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_preferred_birth_dates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='profile',
+            name='oldest_preferred_birth_date',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='youngest_preferred_birth_date',
+            field=models.DateField(db_index=True),
+        ),
+    ]
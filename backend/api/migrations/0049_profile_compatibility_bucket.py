@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+GENDERS = ("male", "female", "other")
+SEXUAL_PREFERENCES = ("male", "female", "all")
+
+
+def backfill_compatibility_bucket(apps, schema_editor):
+    Profile = apps.get_model('api', 'Profile')
+    profiles = list(Profile.objects.only('gender', 'sexual_preference'))
+    for profile in profiles:
+        profile.compatibility_bucket = (
+            GENDERS.index(profile.gender) * len(SEXUAL_PREFERENCES)
+            + SEXUAL_PREFERENCES.index(profile.sexual_preference)
+        )
+    Profile.objects.bulk_update(profiles, ['compatibility_bucket'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0048_profile_preferred_birth_dates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='compatibility_bucket',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.RunPython(backfill_compatibility_bucket, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='profile',
+            name='compatibility_bucket',
+            field=models.PositiveSmallIntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['compatibility_bucket', 'elo'], name='api_profile_compati_a0cde2_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_swipes(apps, schema_editor):
+    Profile = apps.get_model('api', 'Profile')
+    Swipe = apps.get_model('api', 'Swipe')
+    for direction, through in (("left", Profile.left_swiped.through), ("right", Profile.right_swiped.through)):
+        pairs = through.objects.values_list('from_profile_id', 'to_profile_id').iterator(chunk_size=1000)
+        Swipe.objects.bulk_create(
+            (Swipe(swiper_id=swiper_id, target_id=target_id, direction=direction) for swiper_id, target_id in pairs),
+            batch_size=1000,
+            ignore_conflicts=True
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0049_profile_compatibility_bucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Swipe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('direction', models.CharField(choices=[('left', 'left'), ('right', 'right')], max_length=5)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('swiper', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='swipes', to='api.profile')),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='swiped_by', to='api.profile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['target', 'direction'], name='api_swipe_target__fc2f15_idx')],
+                'constraints': [models.UniqueConstraint(fields=('swiper', 'target'), name='unique_swipe')],
+            },
+        ),
+        migrations.RunPython(copy_swipes, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='profile',
+            name='left_swiped',
+        ),
+        migrations.RemoveField(
+            model_name='profile',
+            name='right_swiped',
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0050_swipe'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_swipe_id', models.BigIntegerField()),
+                ('swipe_count', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
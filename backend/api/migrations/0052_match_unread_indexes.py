@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0051_ratingperiod'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(condition=models.Q(('unread_count1__gt', 0)), fields=['profile1'], name='match_unread1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(condition=models.Q(('unread_count2__gt', 0)), fields=['profile2'], name='match_unread2_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:00
+
+import hashlib
+from django.db import migrations, models
+
+
+def backfill_content_hash(apps, schema_editor):
+    Photo = apps.get_model('api', 'Photo')
+    photos = []
+    missing_ids = []
+    for photo in Photo.objects.only('image'):
+        content_hash = hashlib.sha256()
+        try:
+            with photo.image.open('rb') as f:
+                for chunk in f.chunks():
+                    content_hash.update(chunk)
+        except FileNotFoundError:
+            missing_ids.append(photo.pk)
+            continue
+        photo.content_hash = content_hash.hexdigest()
+        photos.append(photo)
+    Photo.objects.bulk_update(photos, ['content_hash'], batch_size=1000)
+    # Photos whose file is gone can neither be hashed nor served
+    Photo.objects.filter(pk__in=missing_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0052_match_unread_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='content_hash',
+            field=models.CharField(default='', editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0053_photo_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='avatar_jpeg',
+            field=models.ImageField(blank=True, upload_to='photos/'),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='avatar_webp',
+            field=models.ImageField(blank=True, upload_to='photos/'),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='card_jpeg',
+            field=models.ImageField(blank=True, upload_to='photos/'),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='card_webp',
+            field=models.ImageField(blank=True, upload_to='photos/'),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='full_jpeg',
+            field=models.ImageField(blank=True, upload_to='photos/'),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='full_webp',
+            field=models.ImageField(blank=True, upload_to='photos/'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0055_photo_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrphanedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterModelOptions(
+            name='photo',
+            options={'ordering': ['order', 'id']},
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='order',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
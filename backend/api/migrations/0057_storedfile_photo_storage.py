@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:00
+
+import api.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0056_photo_order_orphanedfile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('reference_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='photo',
+            name='avatar_jpeg',
+            field=models.ImageField(blank=True, storage=api.storage.get_photo_storage, upload_to='photos/'),
+        ),
+        migrations.AlterField(
+            model_name='photo',
+            name='avatar_webp',
+            field=models.ImageField(blank=True, storage=api.storage.get_photo_storage, upload_to='photos/'),
+        ),
+        migrations.AlterField(
+            model_name='photo',
+            name='card_jpeg',
+            field=models.ImageField(blank=True, storage=api.storage.get_photo_storage, upload_to='photos/'),
+        ),
+        migrations.AlterField(
+            model_name='photo',
+            name='card_webp',
+            field=models.ImageField(blank=True, storage=api.storage.get_photo_storage, upload_to='photos/'),
+        ),
+        migrations.AlterField(
+            model_name='photo',
+            name='full_jpeg',
+            field=models.ImageField(blank=True, storage=api.storage.get_photo_storage, upload_to='photos/'),
+        ),
+        migrations.AlterField(
+            model_name='photo',
+            name='full_webp',
+            field=models.ImageField(blank=True, storage=api.storage.get_photo_storage, upload_to='photos/'),
+        ),
+        migrations.AlterField(
+            model_name='photo',
+            name='image',
+            field=models.ImageField(storage=api.storage.get_photo_storage, upload_to='photos/'),
+        ),
+    ]
@@ -1,18 +1,45 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
-from django.db.models import signals
-from django.dispatch import receiver
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync, sync_to_async
+from django.db.models import signals, F, Value, Case, When, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, Power, Round
+from django.dispatch import receiver, Signal
 from django.core.mail import send_mail
 from django.conf import settings
 from django.utils import timezone
+from django.urls import reverse
+from datetime import date
+from collections import defaultdict
+from functools import reduce
+import operator
+import hashlib
 import uuid
 from secured_fields import EncryptedCharField, EncryptedTextField, utils
 from .fields import EncryptedUsernameField, EncryptedEmailField, EncryptedUUIDField
+from .storage import get_photo_storage
 import os
 
 
+def add_years(birth_date, delta_years):
+    try:
+        return birth_date.replace(year=birth_date.year + delta_years)
+    except ValueError:
+        return date(birth_date.year + delta_years, 3, 1)
+
+
+swipes_recorded = Signal()
+
+PROVISIONAL_SWIPE_COUNT = 30
+PROVISIONAL_K_FACTOR = 48.0
+K_FACTOR = 24.0
+
+PHOTO_SIZES = {"avatar": (160, 160), "card": (720, 960), "full": (1600, 1600)}
+PHOTO_FORMATS = ("webp", "jpeg")
+PHOTO_DERIVATIVES = [f"{size}_{format}" for size in PHOTO_SIZES for format in PHOTO_FORMATS]
+
+GENDERS = ("male", "female", "other")
+SEXUAL_PREFERENCES = ("male", "female", "all")
+
+
 class BannedEmail(models.Model):
     email_hash = models.CharField(max_length=128, unique=True, db_index=True)
 
@@ -68,14 +95,15 @@ class Profile(models.Model):
     last_name = EncryptedCharField(max_length=35)
     bio = EncryptedTextField()
     birth_date = models.DateField(db_index=True)
-    gender = EncryptedCharField(choices=((s, s) for s in ("male", "female", "other")), searchable=True)
-    sexual_preference = EncryptedCharField(choices=((s, s) for s in ("male", "female", "all")), searchable=True)
+    gender = EncryptedCharField(choices=((s, s) for s in GENDERS), searchable=True)
+    sexual_preference = EncryptedCharField(choices=((s, s) for s in SEXUAL_PREFERENCES), searchable=True)
+    compatibility_bucket = models.PositiveSmallIntegerField()
     younger_age_diff = models.SmallIntegerField()
     older_age_diff = models.SmallIntegerField()
+    oldest_preferred_birth_date = models.DateField(db_index=True)
+    youngest_preferred_birth_date = models.DateField(db_index=True)
     elo = models.IntegerField(default=0)
     swiped_on_count = models.PositiveIntegerField(default=0)
-    left_swiped = models.ManyToManyField("self", related_name="left_swiped_by", symmetrical=False, blank=True)
-    right_swiped = models.ManyToManyField("self", related_name="right_swiped_by", symmetrical=False, blank=True)
     matched = models.ManyToManyField(
         "self",
         through="Match",
@@ -83,59 +111,66 @@ class Profile(models.Model):
         blank=True
     )
 
-    def get_elo_change(self, swiper_elo, direction):
-        k_factor = 48 if self.swiped_on_count < 30 else 24
-        expected_score = 1 / (1 + 10**((swiper_elo - self.elo)/400))
-        actual_score = 1 if direction == "right" else 0
-        elo_change = round(k_factor * (actual_score - expected_score))
-        return elo_change
+    class Meta:
+        indexes = [
+            models.Index(fields=["compatibility_bucket", "elo"]),
+        ]
+
+    @staticmethod
+    def get_compatibility_bucket(gender, sexual_preference):
+        return GENDERS.index(gender) * len(SEXUAL_PREFERENCES) + SEXUAL_PREFERENCES.index(sexual_preference)
+
+    def get_compatible_buckets(self):
+        return [
+            self.get_compatibility_bucket(gender, sexual_preference)
+            for gender in GENDERS
+            if self.sexual_preference in (gender, "all")
+            for sexual_preference in (self.gender, "all")
+            if sexual_preference in SEXUAL_PREFERENCES
+        ]
+
+    @staticmethod
+    def get_preferred_birth_dates(birth_date, younger_age_diff, older_age_diff):
+        return {
+            'oldest_preferred_birth_date': add_years(birth_date, -older_age_diff),
+            'youngest_preferred_birth_date': add_years(birth_date, -younger_age_diff),
+        }
+
+    @staticmethod
+    def get_elo_change(swiper_elo, direction):
+        k_factor = Case(
+            When(swiped_on_count__lt=PROVISIONAL_SWIPE_COUNT, then=Value(PROVISIONAL_K_FACTOR)),
+            default=Value(K_FACTOR)
+        )
+        expected_score = 1.0 / (1.0 + Power(10.0, (swiper_elo - F('elo')) / 400.0))
+        actual_score = 1.0 if direction == "right" else 0.0
+        elo_change = Round(k_factor * (actual_score - expected_score))
+        return Cast(elo_change, models.IntegerField())
 
     def swipe(self, other: 'Profile', direction):
         if self == other:
             raise ValueError("Cannot swipe on oneself.")
+        Swipe.objects.bulk_create(
+            [Swipe(swiper=self, target=other, direction=direction)],
+            update_conflicts=True,
+            unique_fields=['swiper', 'target'],
+            update_fields=['direction', 'created_at'],
+        )
+
+        if not settings.ELO_RATING_PERIODS:
+            swiper_elo = Subquery(Profile.objects.filter(pk=self.pk).values('elo'))
+            Profile.objects.filter(pk=other.pk).update(
+                elo=F('elo') + self.get_elo_change(swiper_elo, direction),
+                swiped_on_count=F('swiped_on_count') + 1
+            )
+
         if direction == "left":
-            self.left_swiped.add(other)
-            self.right_swiped.remove(other)
             Match.delete_between(self, other)
-            
-            other.elo += other.get_elo_change(self.elo, direction)
-            other.swiped_on_count += 1
-            other.save(update_fields=['elo', 'swiped_on_count'])
-            
-        elif direction == "right":
-            self.right_swiped.add(other)
-            self.left_swiped.remove(other)
-            
-            other.elo += other.get_elo_change(self.elo, direction)
-            other.swiped_on_count += 1
-            other.save(update_fields=['elo', 'swiped_on_count'])
-            
-            if other.right_swiped.filter(pk=self).exists():
-                Match.get_or_create_between(self, other)
-
-    def notify(self, **kwargs):
-        async_to_sync(self.anotify)(**kwargs)
-    
-    async def anotify(self, type, id):
-        @sync_to_async
-        def increment_unread():
-            other = Profile.objects.get(user_id=id)
-            match = Match.get_between(self, other)
-            match.increment_unread(self)
-
-        if type != "unmatch":
-            await increment_unread()
-        
-        channel_layer = get_channel_layer()
-        group_name = f"notification_{self.user_id}"
-        payload = {"notification_type": type, "id": id}
-        await channel_layer.group_send(
-            group_name,
-            {
-                "type": "notification",
-                "payload": payload
-            }
-        )
+        elif Swipe.objects.filter(swiper=other, target=self, direction="right").exists():
+            Match.get_or_create_between(self, other)
+
+        swipes = {(self.pk, other.pk): direction}
+        transaction.on_commit(lambda: swipes_recorded.send(sender=Swipe, swipes=swipes))
 
     @property
     def full_name(self):
@@ -145,13 +180,181 @@ class Profile(models.Model):
         return f"{self.full_name}'s profile"
 
 
+class Swipe(models.Model):
+    swiper = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name="swipes")
+    target = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name="swiped_by")
+    direction = models.CharField(max_length=5, choices=((s, s) for s in ("left", "right")))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['swiper', 'target'],
+                name='unique_swipe'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["target", "direction"]),
+        ]
+
+    @classmethod
+    def record_many(cls, swipes):
+        swiper_ids = {swiper_id for swiper_id, _ in swipes}
+        target_ids = {target_id for _, target_id in swipes}
+
+        with transaction.atomic():
+            elos = dict(Profile.objects.filter(pk__in=swiper_ids | target_ids).values_list('pk', 'elo'))
+            existing = set(
+                cls.objects
+                .filter(swiper_id__in=swiper_ids, target_id__in=target_ids)
+                .values_list('swiper_id', 'target_id')
+            )
+            new_swipes = {
+                (swiper_id, target_id): direction
+                for (swiper_id, target_id), direction in swipes.items()
+                if swiper_id != target_id
+                and swiper_id in elos and target_id in elos
+                and (swiper_id, target_id) not in existing
+            }
+            if not new_swipes:
+                return new_swipes, set()
+
+            cls.objects.bulk_create(
+                [
+                    cls(swiper_id=swiper_id, target_id=target_id, direction=direction)
+                    for (swiper_id, target_id), direction in new_swipes.items()
+                ],
+                ignore_conflicts=True
+            )
+
+            if not settings.ELO_RATING_PERIODS:
+                swipes_by_target = defaultdict(list)
+                for (swiper_id, target_id), direction in new_swipes.items():
+                    swipes_by_target[target_id].append((elos[swiper_id], direction))
+                Profile.objects.filter(pk__in=swipes_by_target).update(
+                    elo=F('elo') + Case(*(
+                        When(pk=target_id, then=reduce(operator.add, (
+                            Profile.get_elo_change(swiper_elo, direction)
+                            for swiper_elo, direction in target_swipes
+                        )))
+                        for target_id, target_swipes in swipes_by_target.items()
+                    ), output_field=models.IntegerField()),
+                    swiped_on_count=F('swiped_on_count') + Case(*(
+                        When(pk=target_id, then=Value(len(target_swipes)))
+                        for target_id, target_swipes in swipes_by_target.items()
+                    ), output_field=models.PositiveIntegerField())
+                )
+
+            right_swipes = [pair for pair, direction in new_swipes.items() if direction == "right"]
+            reciprocal_swipes = set(
+                cls.objects
+                .filter(
+                    direction="right",
+                    swiper_id__in={target_id for _, target_id in right_swipes},
+                    target_id__in={swiper_id for swiper_id, _ in right_swipes}
+                )
+                .values_list('swiper_id', 'target_id')
+            )
+            matched_pairs = {
+                tuple(sorted((swiper_id, target_id)))
+                for swiper_id, target_id in right_swipes
+                if (target_id, swiper_id) in reciprocal_swipes
+            }
+            profiles = Profile.objects.in_bulk({pk for pair in matched_pairs for pk in pair})
+            for profile1_id, profile2_id in matched_pairs:
+                Match.get_or_create_between(profiles[profile1_id], profiles[profile2_id])
+
+            transaction.on_commit(lambda: swipes_recorded.send(sender=cls, swipes=new_swipes))
+        return new_swipes, matched_pairs
+
+    @classmethod
+    def submit(cls, swiper_id, swipes):
+        requested = {}
+        for swipe in swipes:
+            requested.setdefault((swiper_id, swipe["id"]), swipe["direction"])
+        new_swipes, matched_pairs = cls.record_many(requested)
+
+        results = []
+        seen = set()
+        for swipe in swipes:
+            pair = (swiper_id, swipe["id"])
+            created = pair in new_swipes and pair not in seen
+            seen.add(pair)
+            results.append({
+                "id": swipe["id"],
+                "direction": swipe["direction"],
+                "created": created,
+                "match": created and tuple(sorted(pair)) in matched_pairs,
+            })
+        return results
+
+    def __str__(self):
+        return f"Swipe {self.swiper.full_name} -> {self.target.full_name} ({self.direction})"
+
+
+class RatingPeriod(models.Model):
+    last_swipe_id = models.BigIntegerField()
+    swipe_count = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Rating period up to swipe {self.last_swipe_id}"
+
+
+def get_content_hash(file):
+    content_hash = hashlib.sha256()
+    for chunk in file.chunks():
+        content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
 class Photo(models.Model):
-    image = models.ImageField(upload_to='photos/')
+    image = models.ImageField(upload_to='photos/', storage=get_photo_storage)
+    content_hash = models.CharField(max_length=64, editable=False)
+    status = models.CharField(max_length=10, choices=((s, s) for s in ("processing", "ready")), default="ready")
+    avatar_webp = models.ImageField(upload_to='photos/', storage=get_photo_storage, blank=True)
+    avatar_jpeg = models.ImageField(upload_to='photos/', storage=get_photo_storage, blank=True)
+    card_webp = models.ImageField(upload_to='photos/', storage=get_photo_storage, blank=True)
+    card_jpeg = models.ImageField(upload_to='photos/', storage=get_photo_storage, blank=True)
+    full_webp = models.ImageField(upload_to='photos/', storage=get_photo_storage, blank=True)
+    full_jpeg = models.ImageField(upload_to='photos/', storage=get_photo_storage, blank=True)
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='photos')
+    order = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['order', 'id']
     
     def __str__(self):
         return f"{self.profile.full_name}'s photo ({self.pk})"
 
+    def save(self, *args, **kwargs):
+        if not self.content_hash:
+            self.content_hash = get_content_hash(self.image)
+        super().save(*args, **kwargs)
+
+    def get_derivative(self, size, format):
+        return getattr(self, f"{size}_{format}")
+
+    def get_file(self, size, format):
+        return self.get_derivative(size, format) or self.image
+
+    def get_version(self, size):
+        names = "|".join(self.get_file(size, format).name for format in PHOTO_FORMATS)
+        return hashlib.sha256(names.encode()).hexdigest()[:16]
+
+    def get_url(self, size):
+        return reverse("photo", args=[self.pk, self.get_version(size), size])
+
+
+class OrphanedFile(models.Model):
+    name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class StoredFile(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    reference_count = models.PositiveIntegerField(default=0)
+
 
 class Match(models.Model):
     profile1 = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name="low_matches")
@@ -171,10 +374,14 @@ class Match(models.Model):
                 name='profile1_less_than_profile2'
             )
         ]
+        indexes = [
+            models.Index(fields=['profile1'], condition=models.Q(unread_count1__gt=0), name='match_unread1_idx'),
+            models.Index(fields=['profile2'], condition=models.Q(unread_count2__gt=0), name='match_unread2_idx'),
+        ]
     
     @classmethod
     def normalize(cls, profile1, profile2):
-        return (profile1, profile2) if profile1.user.pk < profile2.user.pk else (profile2, profile1)
+        return (profile1, profile2) if profile1.user_id < profile2.user_id else (profile2, profile1)
 
     @classmethod
     def exists_between(cls, profile1, profile2):
@@ -196,21 +403,24 @@ class Match(models.Model):
         profile1, profile2 = cls.normalize(profile1, profile2)
         return cls.objects.filter(profile1=profile1, profile2=profile2).delete()
 
-    def increment_unread(self, recipient):
-        if recipient == self.profile1:
-            self.unread_count1 += 1
-            self.save(update_fields=['unread_count1'])
-        elif recipient == self.profile2:
-            self.unread_count2 += 1
-            self.save(update_fields=['unread_count2'])
+    def get_unread_field(self, profile):
+        return "unread_count1" if profile.pk == self.profile1_id else "unread_count2"
 
     def reset_unread(self, reader):
-        if reader == self.profile1:
-            self.unread_count1 = 0
-            self.save(update_fields=['unread_count1'])
-        elif reader == self.profile2:
-            self.unread_count2 = 0
-            self.save(update_fields=['unread_count2'])
+        field = self.get_unread_field(reader)
+        Match.objects.filter(pk=self.pk, **{f"{field}__gt": 0}).update(**{field: 0})
+        setattr(self, field, 0)
+
+    @classmethod
+    def get_total_unread(cls, profile):
+        return cls.objects.filter(
+            models.Q(profile1=profile, unread_count1__gt=0) | models.Q(profile2=profile, unread_count2__gt=0)
+        ).aggregate(
+            total_unread=Coalesce(Sum(Case(
+                When(profile1=profile, then=F('unread_count1')),
+                default=F('unread_count2')
+            )), 0)
+        )['total_unread']
 
     def __str__(self):
         return f"Match {self.profile1.full_name} - {self.profile2.full_name}"
@@ -233,36 +443,8 @@ class Message(models.Model):
 
 
 @receiver(signals.post_delete, sender=Photo)
-def delete_image_file_on_delete(sender, instance, **kwargs):
-    if instance.image:
-        instance.image.delete(save=False)
-
-
-@receiver(signals.post_save, sender=Match)
-def notify_on_match(sender, instance, created, **kwargs):
-    if not created:
-        return
-    try:
-        profile1 = instance.profile1
-        profile2 = instance.profile2
-        for profile1, profile2 in ((profile1, profile2), (profile2, profile1)):
-            profile1.notify(
-                type="match",
-                id=profile2.user_id
-            )
-    except Profile.DoesNotExist:
-        pass
-
-
-@receiver(signals.pre_delete, sender=Match)
-def notify_on_unmatch(sender, instance, **kwargs):
-    try:
-        profile1 = instance.profile1
-        profile2 = instance.profile2
-        for profile1, profile2 in ((profile1, profile2), (profile2, profile1)):
-            profile1.notify(
-                type="unmatch",
-                id=profile2.user_id
-            )
-    except Profile.DoesNotExist:
-        pass
+def collect_files_on_delete(sender, instance, **kwargs):
+    OrphanedFile.objects.bulk_create([
+        OrphanedFile(name=getattr(instance, field).name)
+        for field in ['image', *PHOTO_DERIVATIVES] if getattr(instance, field)
+    ])
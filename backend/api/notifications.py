@@ -0,0 +1,84 @@
+import threading
+from collections import defaultdict
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import signals, F
+from django.dispatch import receiver
+from . import models
+
+
+class NotificationDispatcher(threading.local):
+    def __init__(self):
+        self.pending = []
+
+    def notify(self, recipient, type, id, match=None):
+        notification = (recipient, type, id, match)
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            self.dispatch([notification])
+            return
+
+        # Collect through on_commit so rolled back savepoints drop their notifications, and keep
+        # one flush outside any savepoint at the end of the hooks to send the transaction as one batch.
+        transaction.on_commit(lambda: self.pending.append(notification))
+        connection.run_on_commit = [hook for hook in connection.run_on_commit if hook[1] != self.flush]
+        connection.run_on_commit.append((set(), self.flush, False))
+
+    def flush(self):
+        notifications, self.pending = self.pending, []
+        self.dispatch(notifications)
+
+    def dispatch(self, notifications):
+        increments = defaultdict(lambda: defaultdict(int))
+        payloads = defaultdict(dict)
+        for recipient, type, id, match in notifications:
+            if match is not None and type != "unmatch":
+                increments[match.pk][match.get_unread_field(recipient)] += 1
+            payload = payloads[recipient.user_id].setdefault(
+                (type, id), {"notification_type": type, "id": id, "count": 0}
+            )
+            payload["count"] += 1
+
+        for match_id, fields in increments.items():
+            models.Match.objects.filter(pk=match_id).update(
+                **{field: F(field) + count for field, count in fields.items()}
+            )
+
+        channel_layer = get_channel_layer()
+        for user_id, user_payloads in payloads.items():
+            async_to_sync(channel_layer.group_send)(
+                f"notification_{user_id}",
+                {
+                    "type": "notification",
+                    "payloads": list(user_payloads.values())
+                }
+            )
+
+
+dispatcher = NotificationDispatcher()
+notify = dispatcher.notify
+
+
+@receiver(signals.post_save, sender=models.Match)
+def notify_on_match(sender, instance, created, **kwargs):
+    if not created:
+        return
+    try:
+        profile1 = instance.profile1
+        profile2 = instance.profile2
+        for profile1, profile2 in ((profile1, profile2), (profile2, profile1)):
+            notify(profile1, "match", profile2.user_id, instance)
+    except models.Profile.DoesNotExist:
+        pass
+
+
+@receiver(signals.pre_delete, sender=models.Match)
+def notify_on_unmatch(sender, instance, **kwargs):
+    try:
+        profile1 = instance.profile1
+        profile2 = instance.profile2
+        for profile1, profile2 in ((profile1, profile2), (profile2, profile1)):
+            notify(profile1, "unmatch", profile2.user_id)
+    except models.Profile.DoesNotExist:
+        pass
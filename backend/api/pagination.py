@@ -0,0 +1,53 @@
+from django.db.models import Q, Subquery
+from rest_framework import serializers
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+
+
+class MatchPagination(CursorPagination):
+    ordering = ('-last_notification_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class MessageCursorSerializer(serializers.Serializer):
+    before = serializers.IntegerField(required=False)
+    after = serializers.IntegerField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=200, default=50)
+
+    def validate(self, data):
+        if 'before' in data and 'after' in data:
+            raise serializers.ValidationError("Only one of before and after can be given.")
+        return data
+
+
+def paginate_messages(queryset, before=None, after=None, limit=50):
+    if after is not None:
+        created_at = Subquery(queryset.filter(pk=after).values('created_at'))
+        queryset = queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=after)
+        ).order_by('created_at', 'pk')
+    else:
+        if before is not None:
+            created_at = Subquery(queryset.filter(pk=before).values('created_at'))
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=before)
+            )
+        queryset = queryset.order_by('-created_at', '-pk')
+
+    messages = list(queryset[:limit + 1])
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    return (messages if after is not None else messages[::-1]), has_more
+
+
+class MessagePagination(BasePagination):
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor = MessageCursorSerializer(data=request.query_params)
+        cursor.is_valid(raise_exception=True)
+        messages, self.has_more = paginate_messages(queryset, **cursor.validated_data)
+        return messages
+
+    def get_paginated_response(self, data):
+        return Response({"results": data, "has_more": self.has_more})
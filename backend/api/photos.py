@@ -0,0 +1,205 @@
+import mimetypes
+import multiprocessing
+import posixpath
+import re
+import threading
+from collections import Counter
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse
+from django.utils import timezone
+from django.utils.http import parse_etags
+from PIL import Image
+from . import models, candidate_queues, images, notifications
+from .storage import photo_storage
+
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+PROCESSING_ERRORS = (OSError, ValueError, Image.DecompressionBombError)
+GARBAGE_GRACE_PERIOD = timedelta(minutes=10)
+RENDER_ATTEMPTS = 2
+CLAIM_TIMEOUT = 10 * 60
+
+
+def create_process_pool():
+    return ProcessPoolExecutor(
+        max_workers=settings.PHOTO_PROCESSING_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+executor = ThreadPoolExecutor(max_workers=settings.PHOTO_PROCESSING_WORKERS)
+process_pool = create_process_pool()
+process_pool_lock = threading.Lock()
+
+
+def parse_range(match, size):
+    start, end = match.groups()
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def save_derivatives(photo, derivatives):
+    replaced_names = [getattr(photo, field).name for field in derivatives if getattr(photo, field)]
+    for field, content in derivatives.items():
+        extension = field.split("_")[1]
+        getattr(photo, field).save(f"{photo.content_hash}_{field}.{extension}", ContentFile(content), save=False)
+    photo.status = "ready"
+    names = {field: getattr(photo, field).name for field in derivatives}
+    if models.Photo.objects.filter(pk=photo.pk).update(status="ready", **names):
+        orphaned_names = replaced_names
+    else:
+        orphaned_names = names.values()
+    models.OrphanedFile.objects.bulk_create([models.OrphanedFile(name=name) for name in orphaned_names])
+
+
+def read(photo):
+    with photo.image.open("rb") as f:
+        return f.read()
+
+
+def replace_broken_process_pool(broken_pool):
+    global process_pool
+    with process_pool_lock:
+        if process_pool is broken_pool:
+            process_pool = create_process_pool()
+            broken_pool.shutdown(wait=False)
+
+
+def render(data):
+    # A dead worker breaks the whole pool, so replace it and retry once before failing the photo
+    for attempt in range(RENDER_ATTEMPTS):
+        pool = process_pool
+        try:
+            return pool.submit(images.render, data, models.PHOTO_SIZES, models.PHOTO_FORMATS).result()
+        except BrokenProcessPool:
+            replace_broken_process_pool(pool)
+            if attempt == RENDER_ATTEMPTS - 1:
+                raise
+
+
+def get_claim_key(photo_id):
+    return f"photo_processing_{photo_id}"
+
+
+def process(photo_id):
+    if not cache.add(get_claim_key(photo_id), True, CLAIM_TIMEOUT):
+        return
+    try:
+        photo = models.Photo.objects.select_related('profile').filter(pk=photo_id, status="processing").first()
+        if not photo:
+            return
+        try:
+            derivatives = render(read(photo))
+        except (*PROCESSING_ERRORS, BrokenProcessPool):
+            photo.delete()
+            notifications.notify(photo.profile, "photo_failed", photo_id)
+            return
+        save_derivatives(photo, derivatives)
+        notifications.notify(photo.profile, "photo_ready", photo_id)
+    finally:
+        cache.delete(get_claim_key(photo_id))
+        close_old_connections()
+
+
+def schedule_processing(photo):
+    transaction.on_commit(lambda: executor.submit(process, photo.pk))
+
+
+def requeue_processing():
+    for photo_id in models.Photo.objects.filter(status="processing").values_list('pk', flat=True):
+        executor.submit(process, photo_id)
+
+
+def collect_garbage(batch_size=1000):
+    fields = ['image', *models.PHOTO_DERIVATIVES]
+    cutoff = timezone.now() - GARBAGE_GRACE_PERIOD
+    deleted = 0
+    while True:
+        orphans = list(models.OrphanedFile.objects.filter(created_at__lte=cutoff).order_by('pk')[:batch_size])
+        if not orphans:
+            return deleted
+
+        counts = Counter(orphan.name for orphan in orphans)
+        with transaction.atomic():
+            stored_files = models.StoredFile.objects.select_for_update().in_bulk(list(counts), field_name='name')
+            for stored_file in stored_files.values():
+                stored_file.reference_count = max(stored_file.reference_count - counts[stored_file.name], 0)
+            unreferenced_names = {name for name, stored_file in stored_files.items() if not stored_file.reference_count}
+            models.StoredFile.objects.bulk_update(
+                [stored_file for stored_file in stored_files.values() if stored_file.reference_count],
+                ['reference_count'],
+            )
+            models.StoredFile.objects.filter(name__in=unreferenced_names).delete()
+
+            legacy_names = set(counts) - set(stored_files)
+            if legacy_names:
+                referenced = Q()
+                for field in fields:
+                    referenced |= Q(**{f"{field}__in": legacy_names})
+                referenced_names = {
+                    name for row in models.Photo.objects.filter(referenced).values_list(*fields) for name in row
+                }
+                unreferenced_names |= legacy_names - referenced_names
+            models.OrphanedFile.objects.filter(pk__in=[orphan.pk for orphan in orphans]).delete()
+
+            # Unlink under the row locks so a concurrent add_reference waits and rewrites the file
+            for name in unreferenced_names:
+                photo_storage.delete(name)
+                deleted += 1
+
+
+def get_etag(file):
+    # Stored names are content addressed, so the name changes whenever the served bytes do
+    return f'"{posixpath.splitext(posixpath.basename(file.name))[0]}"'
+
+
+def get_format(request):
+    return "webp" if "image/webp" in request.headers.get("Accept", "") else "jpeg"
+
+
+def is_visible(photo, profile):
+    if photo.profile_id == profile.pk:
+        return True
+    low_id, high_id = sorted((photo.profile_id, profile.pk))
+    return (
+        models.Match.objects.filter(profile1_id=low_id, profile2_id=high_id).exists()
+        or candidate_queues.is_served(profile.pk, photo.profile_id)
+    )
+
+
+def serve(request, file, etag):
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Accept-Ranges": "bytes", "Vary": "Accept"}
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in if_none_match or "*" in if_none_match:
+        return HttpResponse(status=304, headers=headers)
+
+    content_type = mimetypes.guess_type(file.name)[0] or "application/octet-stream"
+    size = file.size
+    match = RANGE_PATTERN.match(request.headers.get("Range", ""))
+    if match and match.groups() != ("", "") and request.headers.get("If-Range", etag) == etag:
+        byte_range = parse_range(match, size)
+        if byte_range is None:
+            return HttpResponse(status=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        start, end = byte_range
+        with file.open("rb") as f:
+            f.seek(start)
+            content = f.read(end - start + 1)
+        return HttpResponse(
+            content,
+            status=206,
+            content_type=content_type,
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"},
+        )
+
+    return FileResponse(file.open("rb"), content_type=content_type, headers=headers)
@@ -0,0 +1,29 @@
+from django.core.cache import cache
+
+TIMEOUT = 90
+HEARTBEAT_INTERVAL = 30
+
+
+def get_key(user_id):
+    return f"chat_presence_{user_id}"
+
+
+async def enter(user_id, recipient_id, channel_name):
+    await cache.aset(get_key(user_id), (recipient_id, channel_name), TIMEOUT)
+
+
+async def heartbeat(user_id, recipient_id, channel_name):
+    entry = await cache.aget(get_key(user_id))
+    if entry is None or entry[1] == channel_name:
+        await enter(user_id, recipient_id, channel_name)
+
+
+async def leave(user_id, channel_name):
+    entry = await cache.aget(get_key(user_id))
+    if entry and entry[1] == channel_name:
+        await cache.adelete(get_key(user_id))
+
+
+def get_open_chat(user_id):
+    entry = cache.get(get_key(user_id))
+    return entry[0] if entry else None
@@ -0,0 +1,166 @@
+from contextlib import contextmanager
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q, Max
+from django.utils import timezone
+import numpy as np
+from . import models, matchmaking
+
+CHUNK_SIZE = 50000
+SETTLE_TIME = timedelta(minutes=1)
+LOCK_KEY = "rating_period_lock"
+LOCK_TIMEOUT = 60 * 60
+
+
+class RatingPeriodInProgress(Exception):
+    pass
+
+
+@contextmanager
+def lock():
+    if not cache.add(LOCK_KEY, True, LOCK_TIMEOUT):
+        raise RatingPeriodInProgress()
+    try:
+        yield
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+class Ratings:
+    def __init__(self, rows):
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.elos = np.array([row[1] for row in rows], dtype=np.int64)
+        self.counts = np.array([row[2] for row in rows], dtype=np.int64)
+        self.start_period()
+
+    @classmethod
+    def load(cls):
+        return cls(list(models.Profile.objects.order_by('pk').values_list('pk', 'elo', 'swiped_on_count')))
+
+    @classmethod
+    def initial(cls):
+        return cls([(pk, 0, 0) for pk in models.Profile.objects.order_by('pk').values_list('pk', flat=True)])
+
+    def start_period(self):
+        self.score_changes = np.zeros(len(self.ids))
+        self.swipe_counts = np.zeros(len(self.ids), dtype=np.int64)
+
+    def index_of(self, profile_ids):
+        indices = np.minimum(np.searchsorted(self.ids, profile_ids), len(self.ids) - 1)
+        return indices, self.ids[indices] == profile_ids
+
+    def add_swipes(self, swiper_ids, target_ids, scores):
+        if not len(self.ids):
+            return
+        swipers, swipers_found = self.index_of(swiper_ids)
+        targets, targets_found = self.index_of(target_ids)
+        found = swipers_found & targets_found
+        swipers, targets, scores = swipers[found], targets[found], scores[found]
+
+        expected_scores = 1.0 / (1.0 + 10.0 ** ((self.elos[swipers] - self.elos[targets]) / 400.0))
+        self.score_changes += np.bincount(targets, weights=scores - expected_scores, minlength=len(self.ids))
+        self.swipe_counts += np.bincount(targets, minlength=len(self.ids))
+
+    def end_period(self):
+        k_factors = np.where(
+            self.counts < models.PROVISIONAL_SWIPE_COUNT,
+            models.PROVISIONAL_K_FACTOR,
+            models.K_FACTOR
+        )
+        self.elos += np.rint(k_factors * self.score_changes).astype(np.int64)
+        self.counts += self.swipe_counts
+        self.start_period()
+
+    def save(self, changed=None):
+        if changed is None:
+            changed = np.ones(len(self.ids), dtype=bool)
+        models.Profile.objects.bulk_update(
+            [
+                models.Profile(pk=pk, elo=elo, swiped_on_count=count)
+                for pk, elo, count in zip(
+                    self.ids[changed].tolist(), self.elos[changed].tolist(), self.counts[changed].tolist()
+                )
+            ],
+            ['elo', 'swiped_on_count'],
+            batch_size=1000
+        )
+        return int(changed.sum())
+
+
+def iterate_swipes(queryset, chunk_size=CHUNK_SIZE):
+    queryset = queryset.order_by('created_at', 'pk').values_list('pk', 'created_at', 'swiper_id', 'target_id', 'direction')
+    after = None
+    while True:
+        chunk = queryset
+        if after:
+            chunk = chunk.filter(Q(created_at__gt=after[0]) | Q(created_at=after[0], pk__gt=after[1]))
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        after = rows[-1][1], rows[-1][0]
+
+
+def to_arrays(rows):
+    return (
+        np.array([row[2] for row in rows], dtype=np.int64),
+        np.array([row[3] for row in rows], dtype=np.int64),
+        np.array([row[4] == "right" for row in rows], dtype=np.float64),
+    )
+
+
+def get_settled_swipe_id(after_id=0):
+    return models.Swipe.objects.filter(
+        pk__gt=after_id, created_at__lt=timezone.now() - SETTLE_TIME
+    ).aggregate(last_swipe_id=Max('pk'))['last_swipe_id']
+
+
+def run_period(chunk_size=CHUNK_SIZE):
+    with lock(), transaction.atomic():
+        last_period = models.RatingPeriod.objects.order_by('-pk').first()
+        first_swipe_id = last_period.last_swipe_id if last_period else 0
+        last_swipe_id = get_settled_swipe_id(first_swipe_id)
+        if last_swipe_id is None:
+            return None
+
+        swipes = models.Swipe.objects.filter(pk__gt=first_swipe_id, pk__lte=last_swipe_id)
+        ratings = Ratings.load()
+        original_elos, original_counts = ratings.elos.copy(), ratings.counts.copy()
+        swipe_count = 0
+        for rows in iterate_swipes(swipes, chunk_size):
+            ratings.add_swipes(*to_arrays(rows))
+            swipe_count += len(rows)
+
+        ratings.end_period()
+        updated_count = ratings.save((ratings.elos != original_elos) | (ratings.counts != original_counts))
+        models.RatingPeriod.objects.create(last_swipe_id=last_swipe_id, swipe_count=swipe_count)
+    matchmaking.bump_elo_version()
+    return swipe_count, updated_count
+
+
+def recompute(period_length, chunk_size=CHUNK_SIZE):
+    with lock(), transaction.atomic():
+        last_swipe_id = get_settled_swipe_id() or 0
+        swipes = models.Swipe.objects.filter(pk__lte=last_swipe_id)
+        ratings = Ratings.initial()
+        swipe_count = 0
+        period_end = None
+        for rows in iterate_swipes(swipes, chunk_size):
+            start = 0
+            for i, row in enumerate(rows):
+                if period_end is None:
+                    period_end = row[1] + period_length
+                elif row[1] >= period_end:
+                    ratings.add_swipes(*to_arrays(rows[start:i]))
+                    ratings.end_period()
+                    start = i
+                    period_end += ((row[1] - period_end) // period_length + 1) * period_length
+            ratings.add_swipes(*to_arrays(rows[start:]))
+            swipe_count += len(rows)
+
+        ratings.end_period()
+        updated_count = ratings.save()
+        models.RatingPeriod.objects.create(last_swipe_id=last_swipe_id, swipe_count=swipe_count)
+    matchmaking.bump_elo_version()
+    return swipe_count, updated_count
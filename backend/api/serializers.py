@@ -1,11 +1,20 @@
 from rest_framework import serializers
 from . import models
+from .models import add_years
+from . import candidate_queues
+from . import images
+from .photos import schedule_processing, PROCESSING_ERRORS
 from django.contrib.auth.password_validation import validate_password
-import base64
+from django.db import transaction
 from datetime import date
 import re
 
 
+def get_age(birth_date):
+    today = date.today()
+    return (today.year - birth_date.year) - ((today.month, today.day) < (birth_date.month, birth_date.day))
+
+
 class UserSerializer(serializers.ModelSerializer):
     has_profile = serializers.SerializerMethodField()
 
@@ -49,35 +58,68 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class PhotoSerializer(serializers.ModelSerializer):
-    blob = serializers.SerializerMethodField()
+    url = serializers.SerializerMethodField()
     
     class Meta:
         model = models.Photo
-        fields = ['id', 'blob']
-        
-    def get_blob(self, instance):
-        with instance.image.open("rb") as f:
-            return base64.b64encode(f.read()).decode("utf-8")
+        fields = ['id', 'status', 'url']
+
+    def __init__(self, *args, size="full", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.size = size
+
+    def get_url(self, instance):
+        if instance.status == "processing":
+            return None
+        return instance.get_url(self.size)
 
 
 class ProfileSerializer(serializers.ModelSerializer):
-    photos = PhotoSerializer(many=True, required=False)
+    photos = PhotoSerializer(many=True, required=False, size="card")
+    photo_order = serializers.ListField(child=serializers.CharField(), write_only=True, required=False)
 
     class Meta:
         model = models.Profile
-        fields = ['user', 'first_name', 'last_name', 'bio', 'gender', 'sexual_preference', "birth_date", 'younger_age_diff', 'older_age_diff', 'photos']
+        fields = ['user', 'first_name', 'last_name', 'bio', 'gender', 'sexual_preference', "birth_date", 'younger_age_diff', 'older_age_diff', 'photos', 'photo_order']
         extra_kwargs = {
             'user': {'read_only': True},
             'first_name': {'read_only': True},
             'last_name': {'read_only': True},
         }
     
+    def validate_photo_order(self, photo_order):
+        uploads = self.context['request'].FILES.getlist('photos')
+        if photo_order.count("new") != len(uploads):
+            raise serializers.ValidationError(
+                'Photo order must contain "new" once for every uploaded photo.'
+            )
+        
+        photo_ids = [token for token in photo_order if token != "new"]
+        existing_ids = {str(pk) for pk in self.instance.photos.values_list('pk', flat=True)} if self.instance else set()
+        if len(set(photo_ids)) != len(photo_ids) or not set(photo_ids) <= existing_ids:
+            raise serializers.ValidationError(
+                'Photo order contains unknown or duplicate photos.'
+            )
+        
+        if not photo_order:
+            raise serializers.ValidationError(
+                'At least one photo is required.'
+            )
+        return photo_order
+    
     def validate(self, profile):
         is_profile_creation = self.instance is None
         if is_profile_creation and not self.context['request'].FILES.getlist('photos'):
             raise serializers.ValidationError({
                 'photos': 'At least one photo is required.'
             })
+        for photo in self.context['request'].FILES.getlist('photos'):
+            try:
+                images.verify(photo)
+            except PROCESSING_ERRORS:
+                raise serializers.ValidationError({
+                    'photos': f'{photo.name} is not a valid image.'
+                })
         
         birth_date = profile.get('birth_date') or self.instance.birth_date
         younger_age_diff = profile.get('younger_age_diff')
@@ -86,16 +128,10 @@ class ProfileSerializer(serializers.ModelSerializer):
         older_age_diff = older_age_diff if older_age_diff is not None else self.instance.older_age_diff
         
         today = date.today()
-
-        def add_years(birth_date, delta_years):
-            return date(
-                birth_date.year + delta_years,
-                birth_date.month,
-                birth_date.day
-            )
         
-        youngest_preferred_birth_date = add_years(birth_date, -younger_age_diff)
-        oldest_preferred_birth_date = add_years(birth_date, -older_age_diff)
+        preferred_birth_dates = models.Profile.get_preferred_birth_dates(birth_date, younger_age_diff, older_age_diff)
+        youngest_preferred_birth_date = preferred_birth_dates['youngest_preferred_birth_date']
+        oldest_preferred_birth_date = preferred_birth_dates['oldest_preferred_birth_date']
         
         youngest_legal_birth_date = add_years(birth_date, 3)
         oldest_legal_birth_date = add_years(birth_date, -3)
@@ -125,6 +161,11 @@ class ProfileSerializer(serializers.ModelSerializer):
                 'younger_age_diff': 'Minimum age difference cannot be greater than maximum age difference.'
             })
         
+        profile.update(preferred_birth_dates)
+        profile['compatibility_bucket'] = models.Profile.get_compatibility_bucket(
+            profile.get('gender') or self.instance.gender,
+            profile.get('sexual_preference') or self.instance.sexual_preference
+        )
         return profile
 
     def create(self, validated_data):
@@ -137,51 +178,100 @@ class ProfileSerializer(serializers.ModelSerializer):
         else:
             validated_data['last_name'] = ""
         
+        photo_order = validated_data.pop('photo_order', None)
         profile = models.Profile.objects.create(**validated_data)
         
         photos = self.context['request'].FILES.getlist('photos')
-        for photo in photos:
-            models.Photo.objects.create(profile=profile, image=photo)
+        self.save_photos(profile, photo_order or ["new"] * len(photos))
         
         return profile
     
     def update(self, instance, validated_data):
+        photo_order = validated_data.pop('photo_order', None)
+        deck_fields = ('birth_date', 'younger_age_diff', 'older_age_diff', 'gender', 'sexual_preference')
+        old_values = [getattr(instance, field) for field in deck_fields]
         instance = super().update(instance, validated_data)
+        if old_values != [getattr(instance, field) for field in deck_fields]:
+            candidate_queues.invalidate(instance.pk)
+            candidate_queues.broadcast_refill(instance)
         
         photos = self.context['request'].FILES.getlist('photos')
-        if photos:
-            instance.photos.all().delete()
-            for photo in photos:
-                models.Photo.objects.create(profile=instance, image=photo)
+        if photo_order is None and photos:
+            photo_order = ["new"] * len(photos)
+        if photo_order is not None:
+            self.save_photos(instance, photo_order)
         
         return instance
     
+    def save_photos(self, profile, photo_order):
+        uploads = iter(self.context['request'].FILES.getlist('photos'))
+        kept_photos = []
+        with transaction.atomic():
+            profile.photos.exclude(pk__in=[token for token in photo_order if token != "new"]).delete()
+            for order, token in enumerate(photo_order):
+                if token == "new":
+                    schedule_processing(models.Photo.objects.create(
+                        profile=profile, image=next(uploads), status="processing", order=order
+                    ))
+                else:
+                    kept_photos.append(models.Photo(pk=int(token), profile=profile, order=order))
+            models.Photo.objects.bulk_update(kept_photos, ['order'])
+    
     def to_representation(self, instance):
         data = super().to_representation(instance)
         request = self.context.get("request")
+        user = self.context.get("user") or getattr(request, "user", None)
         
-        if request and instance.user != request.user:
+        if user and instance.user_id != user.pk:
             data.pop("sexual_preference", None)
             data.pop("younger_age_diff", None)
             data.pop("older_age_diff", None)
             
-            today = date.today()
-            birth_date = date.fromisoformat(data.pop("birth_date", None))
-            age = (today.year - birth_date.year) - ((today.month, today.day) < (birth_date.month, birth_date.day))
-            data["age"] = age
+            data["age"] = get_age(date.fromisoformat(data.pop("birth_date", None)))
         return data
 
 
+class MatchProfileSerializer(serializers.ModelSerializer):
+    age = serializers.SerializerMethodField()
+    photos = PhotoSerializer(many=True, read_only=True, size="avatar")
+
+    class Meta:
+        model = models.Profile
+        fields = ['user', 'first_name', 'last_name', 'age', 'photos']
+
+    def get_age(self, instance):
+        return get_age(instance.birth_date)
+
+
+class MatchSerializer(serializers.ModelSerializer):
+    profile = serializers.SerializerMethodField()
+    unread_count = serializers.IntegerField()
+
+    class Meta:
+        model = models.Match
+        fields = ['profile', 'unread_count']
+
+    def get_profile(self, match):
+        profile = self.context['request'].user.profile
+        other_profile = match.profile2 if match.profile1_id == profile.pk else match.profile1
+        return MatchProfileSerializer(other_profile).data
+
+
 class MessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Message
-        fields = ["sender", "recipient", "text", "created_at"]
+        fields = ["id", "sender", "recipient", "text", "created_at"]
         extra_kwargs = {
             'created_at': {'read_only': True},
             'recipient': {'write_only': True},
         }
 
 
+class SwipeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    direction = serializers.ChoiceField(choices=("left", "right"))
+
+
 class PasswordResetSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True, required=True)
 
@@ -0,0 +1,49 @@
+import hashlib
+import posixpath
+import re
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+
+CONTENT_ADDRESSED_NAME = re.compile(r"(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$")
+
+
+def is_content_addressed(name):
+    return bool(CONTENT_ADDRESSED_NAME.search(name))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def __init__(self, **kwargs):
+        super().__init__(allow_overwrite=True, **kwargs)
+
+    def get_content_name(self, name, content):
+        content_hash = hashlib.sha256()
+        for chunk in content.chunks():
+            content_hash.update(chunk)
+        content_hash = content_hash.hexdigest()
+        extension = posixpath.splitext(name)[1].lower()
+        return posixpath.join(
+            posixpath.dirname(name), content_hash[:2], content_hash[2:4], content_hash + extension
+        )
+
+    def add_reference(self, name, count=1):
+        StoredFile = apps.get_model("api", "StoredFile")
+        if StoredFile.objects.filter(name=name).update(reference_count=F("reference_count") + count):
+            return
+        _, created = StoredFile.objects.get_or_create(name=name, defaults={"reference_count": count})
+        if not created:
+            StoredFile.objects.filter(name=name).update(reference_count=F("reference_count") + count)
+
+    def _save(self, name, content):
+        name = self.get_content_name(name, content)
+        self.add_reference(name)
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
+
+
+photo_storage = ContentAddressedStorage()
+
+
+def get_photo_storage():
+    return photo_storage
@@ -0,0 +1,92 @@
+import time
+from array import array
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from django.core.cache import cache
+from django.db.models import Q, signals
+from django.dispatch import receiver
+from . import models
+
+TIMEOUT = 24 * 60 * 60
+LOCK_TIMEOUT = 10
+LOCK_ATTEMPTS = 50
+LOCK_WAIT = 0.01
+
+
+def get_key(profile_id):
+    return f"swipe_exclusions_{profile_id}"
+
+
+@contextmanager
+def lock(profile_id):
+    key = f"{get_key(profile_id)}_lock"
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(key, True, LOCK_TIMEOUT):
+            try:
+                yield True
+            finally:
+                cache.delete(key)
+            return
+        time.sleep(LOCK_WAIT)
+    yield False
+
+
+def build(profile_id):
+    # Read and cache under the lock so add_swipes either patches this array or runs before the read
+    with lock(profile_id) as locked:
+        pairs = models.Swipe.objects.filter(
+            Q(swiper_id=profile_id) | Q(target_id=profile_id, direction="left")
+        ).values_list('swiper_id', 'target_id')
+        ids = {target_id if swiper_id == profile_id else swiper_id for swiper_id, target_id in pairs}
+        exclusions = array('q', sorted(ids))
+        if locked:
+            cache.set(get_key(profile_id), exclusions.tobytes(), TIMEOUT)
+    return exclusions
+
+
+def get(profile_id):
+    data = cache.get(get_key(profile_id))
+    if data is None:
+        return build(profile_id)
+    exclusions = array('q')
+    exclusions.frombytes(data)
+    return exclusions
+
+
+def contains(exclusions, profile_id):
+    i = bisect_left(exclusions, profile_id)
+    return i < len(exclusions) and exclusions[i] == profile_id
+
+
+def add_swipes(swipes):
+    excluded_ids = {}
+    for (swiper_id, target_id), direction in swipes.items():
+        excluded_ids.setdefault(swiper_id, set()).add(target_id)
+        if direction == "left":
+            excluded_ids.setdefault(target_id, set()).add(swiper_id)
+
+    for profile_id, ids in excluded_ids.items():
+        key = get_key(profile_id)
+        with lock(profile_id) as locked:
+            if not locked:
+                cache.delete(key)
+                continue
+            data = cache.get(key)
+            if data is None:
+                continue
+            exclusions = array('q')
+            exclusions.frombytes(data)
+            for excluded_id in ids:
+                if not contains(exclusions, excluded_id):
+                    insort(exclusions, excluded_id)
+            cache.set(key, exclusions.tobytes(), TIMEOUT)
+
+
+@receiver(models.swipes_recorded)
+def add_on_swipe(sender, swipes, **kwargs):
+    add_swipes(swipes)
+
+
+@receiver(signals.post_delete, sender=models.Profile)
+def delete_on_delete(sender, instance, **kwargs):
+    cache.delete(get_key(instance.pk))
@@ -1,3 +1,155 @@
-# from django.test import TestCase
+from datetime import date, timedelta
+from unittest import mock, skipUnless
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from . import models, deck, matchmaking
+from .pagination import paginate_messages
 
-# Create your tests here.
+
+def create_profile(number, elo=0, gender="female", sexual_preference="male", birth_date=date(2008, 6, 1)):
+    user = models.User.objects.create(username=f"user{number}", email=f"user{number}@example.ch")
+    return models.Profile.objects.create(
+        user=user,
+        first_name="User",
+        last_name=str(number),
+        bio="",
+        birth_date=birth_date,
+        gender=gender,
+        sexual_preference=sexual_preference,
+        compatibility_bucket=models.Profile.get_compatibility_bucket(gender, sexual_preference),
+        younger_age_diff=-2,
+        older_age_diff=2,
+        elo=elo,
+        **models.Profile.get_preferred_birth_dates(birth_date, -2, 2),
+    )
+
+
+class DeckTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.profile = create_profile(0, gender="male", sexual_preference="female")
+        elos = [0, 0, 10, -10, 10, -10, 25, -24, 24, -25, 60, -60, 100, 100, -100, 5, -5, 5, 300, -300]
+        candidates = [create_profile(number, elo) for number, elo in enumerate(elos, 1)]
+        create_profile(30, 0, gender="male")
+        create_profile(31, 0, birth_date=date(2003, 1, 1))
+        create_profile(32, 0, sexual_preference="female")
+        models.Swipe.objects.bulk_create([
+            models.Swipe(swiper=self.profile, target=candidates[0], direction="right"),
+            models.Swipe(swiper=self.profile, target=candidates[2], direction="left"),
+            models.Swipe(swiper=candidates[3], target=self.profile, direction="left"),
+            models.Swipe(swiper=candidates[4], target=self.profile, direction="right"),
+        ])
+        self.excluded_ids = {candidates[0].pk, candidates[2].pk, candidates[3].pk}
+
+    def test_sql_deck_excludes_swiped_and_incompatible_profiles(self):
+        deck_ids = [profile.pk for profile in deck.get_deck(self.profile, 100)]
+        self.assertEqual(len(deck_ids), 17)
+        self.assertFalse(self.excluded_ids & set(deck_ids))
+
+    @skipUnless(matchmaking.np is not None, "numpy is not installed")
+    def test_sql_deck_matches_engine(self):
+        engine = matchmaking.MatchmakingEngine()
+        with mock.patch.object(matchmaking, "close_old_connections"):
+            engine.load()
+        for size in (1, 4, 9, 100):
+            self.assertEqual(
+                [profile.pk for profile in deck.get_deck(self.profile, size)],
+                engine.get_candidate_ids(self.profile, size),
+            )
+
+
+class RecordSwipesTests(TestCase):
+    def setUp(self):
+        self.profile, self.other, self.third = (create_profile(number) for number in range(3))
+
+    def test_record_many_skips_existing_self_and_unknown_swipes(self):
+        models.Swipe.objects.create(swiper=self.profile, target=self.other, direction="right")
+        new_swipes, matched_pairs = models.Swipe.record_many({
+            (self.profile.pk, self.other.pk): "left",
+            (self.profile.pk, self.profile.pk): "right",
+            (self.profile.pk, 999999): "right",
+            (self.profile.pk, self.third.pk): "left",
+        })
+        self.assertEqual(new_swipes, {(self.profile.pk, self.third.pk): "left"})
+        self.assertEqual(matched_pairs, set())
+        self.assertEqual(models.Swipe.objects.count(), 2)
+        self.assertEqual(models.Swipe.objects.get(swiper=self.profile, target=self.other).direction, "right")
+
+    def test_record_many_detects_mutual_matches(self):
+        models.Swipe.objects.create(swiper=self.other, target=self.profile, direction="right")
+        models.Swipe.objects.create(swiper=self.third, target=self.profile, direction="left")
+        _, matched_pairs = models.Swipe.record_many({
+            (self.profile.pk, self.other.pk): "right",
+            (self.profile.pk, self.third.pk): "right",
+            (self.other.pk, self.third.pk): "right",
+            (self.third.pk, self.other.pk): "right",
+        })
+        self.assertEqual(matched_pairs, {
+            tuple(sorted((self.profile.pk, self.other.pk))),
+            tuple(sorted((self.other.pk, self.third.pk))),
+        })
+        self.assertTrue(models.Match.exists_between(self.profile, self.other))
+        self.assertTrue(models.Match.exists_between(self.other, self.third))
+        self.assertFalse(models.Match.exists_between(self.profile, self.third))
+
+
+class SubmitSwipesTests(TestCase):
+    def setUp(self):
+        self.profile, self.other, self.third = (create_profile(number) for number in range(3))
+
+    def test_submit_reports_each_requested_swipe(self):
+        models.Swipe.objects.create(swiper=self.other, target=self.profile, direction="right")
+        results = models.Swipe.submit(self.profile.pk, [
+            {"id": self.other.pk, "direction": "right"},
+            {"id": self.other.pk, "direction": "left"},
+            {"id": self.third.pk, "direction": "left"},
+            {"id": 999999, "direction": "right"},
+        ])
+        self.assertEqual(results, [
+            {"id": self.other.pk, "direction": "right", "created": True, "match": True},
+            {"id": self.other.pk, "direction": "left", "created": False, "match": False},
+            {"id": self.third.pk, "direction": "left", "created": True, "match": False},
+            {"id": 999999, "direction": "right", "created": False, "match": False},
+        ])
+        self.assertEqual(models.Swipe.objects.get(swiper=self.profile, target=self.other).direction, "right")
+
+    def test_submit_does_not_recreate_existing_swipes(self):
+        models.Swipe.objects.create(swiper=self.profile, target=self.other, direction="left")
+        models.Swipe.objects.create(swiper=self.other, target=self.profile, direction="right")
+        results = models.Swipe.submit(self.profile.pk, [{"id": self.other.pk, "direction": "right"}])
+        self.assertEqual(results, [{"id": self.other.pk, "direction": "right", "created": False, "match": False}])
+        self.assertFalse(models.Match.exists_between(self.profile, self.other))
+
+
+class PaginateMessagesTests(TestCase):
+    def setUp(self):
+        profile, other = create_profile(0), create_profile(1)
+        match, _ = models.Match.get_or_create_between(profile, other)
+        messages = [
+            models.Message.objects.create(sender=profile, recipient=other, match=match, text=str(i))
+            for i in range(7)
+        ]
+        now = timezone.now()
+        for i, message in enumerate(messages):
+            message.created_at = now + timedelta(seconds=i // 2)
+        models.Message.objects.bulk_update(messages, ['created_at'])
+        self.ids = [message.pk for message in messages]
+        self.queryset = models.Message.objects.filter(match=match)
+
+    def get_ids(self, **cursor):
+        messages, has_more = paginate_messages(self.queryset, **cursor)
+        return [message.pk for message in messages], has_more
+
+    def test_latest_page(self):
+        self.assertEqual(self.get_ids(limit=3), (self.ids[4:], True))
+        self.assertEqual(self.get_ids(limit=7), (self.ids, False))
+
+    def test_before_cursor_walks_back_through_ties(self):
+        self.assertEqual(self.get_ids(before=self.ids[4], limit=3), (self.ids[1:4], True))
+        self.assertEqual(self.get_ids(before=self.ids[1], limit=3), (self.ids[:1], False))
+
+    def test_after_cursor_walks_forward_through_ties(self):
+        self.assertEqual(self.get_ids(after=self.ids[0], limit=3), (self.ids[1:4], True))
+        self.assertEqual(self.get_ids(after=self.ids[3], limit=3), (self.ids[4:], False))
+        self.assertEqual(self.get_ids(after=self.ids[6]), ([], False))
@@ -11,6 +11,7 @@ urlpatterns = [
     path('matches/', views.MatchView.as_view()),
     path('match/<int:other_id>/', views.MatchView.as_view()),
     path('message/<int:recipient_id>/', views.MessageView.as_view()),
+    path('photo/<int:pk>/<str:version>/<str:size>/', views.PhotoView.as_view(), name='photo'),
     path("verify-email/<uuid:token>/", views.verify_email),
     path("resend-verification/", views.resend_verification),
     path("request-password-reset/", views.request_password_reset),
@@ -19,4 +20,5 @@ urlpatterns = [
     path("report-conversation/<int:other_id>/", views.report_conversation),
     path("report-profile/<int:other_id>/", views.report_profile),
     path("accept-tos/", views.accept_tos),
+    path("unread-count/", views.unread_count),
 ]
@@ -2,9 +2,7 @@ from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from . import models, serializers
 from rest_framework.parsers import MultiPartParser, JSONParser
-from django.db.models import Q, F, Value, Func, DateField, Case, When, IntegerField, ExpressionWrapper
-from django.db.models.functions import Concat
-from datetime import date
+from django.db.models import Q, F, Case, When, IntegerField, Prefetch, Subquery
 from rest_framework.response import Response
 from django.utils import timezone
 from datetime import timedelta
@@ -14,6 +12,13 @@ from .models import User
 from django.core.mail import send_mail
 from django.conf import settings
 from . import permissions
+from . import candidate_queues
+from . import photos
+from .consumers import swipe_buffer
+from rest_framework.views import APIView
+from django.http import Http404, HttpResponseRedirect
+from django.shortcuts import get_object_or_404
+from .pagination import MatchPagination, MessagePagination
 import uuid
 import os
 
@@ -60,110 +65,38 @@ class SwipeView(generics.ListAPIView):
     serializer_class = serializers.ProfileSerializer
     permission_classes = [permissions.hasProfile]
     batch_size = 3 if settings.DEPLOY else 10
+    max_submit_size = 100
     
     def get_queryset(self):
-        user = self.request.user
-        profile = user.profile
-        
-        swiped_users = (profile.left_swiped.all() | profile.right_swiped.all()).values_list("user", flat=True)
-        left_swiped_by_users = profile.left_swiped_by.all().values_list("user", flat=True)
-        
-        def add_years(birth_date, delta_years):
-            return date(
-                birth_date.year + delta_years,
-                birth_date.month,
-                birth_date.day
-            )
-        
-        youngest_other_birth_date = add_years(profile.birth_date, -profile.younger_age_diff)
-        oldest_other_birth_date = add_years(profile.birth_date, -profile.older_age_diff)
-        
-        youngest_self_limit = ExpressionWrapper(
-            F('birth_date') + F('younger_age_diff') * timedelta(days=365),
-            output_field=DateField()
-        ) if settings.DEPLOY else Func(
-            Value(profile.birth_date),
-            Concat(F('younger_age_diff'), Value(' years')),
-            function='DATE',
-            output_field=DateField(),
-        )
-
-        oldest_self_limit = ExpressionWrapper(
-            F('birth_date') + F('older_age_diff') * timedelta(days=365),
-            output_field=DateField()
-        ) if settings.DEPLOY else Func(
-            Value(profile.birth_date),
-            Concat(F('older_age_diff'), Value(' years')),
-            function='DATE',
-            output_field=DateField(),
-        )
+        profile = self.request.user.profile
+        return candidate_queues.pop(profile, self.batch_size, swipe_buffer.get_target_ids(profile.pk))
 
-        is_compatible = (
-            ~Q(user=user)
-            & ~Q(user__in=swiped_users)
-            & ~Q(user__in=left_swiped_by_users)
-            & (Q(sexual_preference=profile.gender) | Q(sexual_preference="all"))
-            & (
-                Q(gender=profile.sexual_preference)
-                if profile.sexual_preference != "all"
-                else Q()
-            )
-            
-            & Q(birth_date__lte=youngest_other_birth_date)
-            & Q(birth_date__gte=oldest_other_birth_date)
-            
-            & Q(birth_date__gte=youngest_self_limit)
-            & Q(birth_date__lte=oldest_self_limit)
+    def post(self, request):
+        serializer = serializers.SwipeSerializer(
+            data=request.data, many=True, allow_empty=False, max_length=self.max_submit_size
         )
-        
-        queryset = []
-        i_higher = 0
-        i_lower = 0
-        
-        while len(queryset) < self.batch_size:
-            higher = models.Profile.objects.filter(
-                is_compatible,
-                elo__gte=profile.elo
-            ).order_by('elo')[i_higher:i_higher+1].first()
-            
-            lower = models.Profile.objects.filter(
-                is_compatible,
-                elo__lt=profile.elo
-            ).order_by('-elo')[i_lower:i_lower+1].first()
-            
-            if not higher and not lower:
-                break
-
-            if higher and lower:
-                higher_diff = abs(higher.elo - profile.elo)
-                lower_diff = abs(lower.elo - profile.elo)
-                if higher_diff <= lower_diff:
-                    queryset.append(higher)
-                    i_higher += 1
-                else:
-                    queryset.append(lower)
-                    i_lower += 1
-            elif higher:
-                queryset.append(higher)
-                i_higher += 1
-            else:
-                queryset.append(lower)
-                i_lower += 1
-        
-        return queryset
+        serializer.is_valid(raise_exception=True)
+        results = models.Swipe.submit(request.user.profile.pk, serializer.validated_data)
+        return Response(results)
 
 
 class MatchView(generics.ListAPIView):
-    serializer_class = serializers.ProfileSerializer
+    serializer_class = serializers.MatchSerializer
     permission_classes = [permissions.hasProfile]
+    pagination_class = MatchPagination
     
     def get_queryset(self):
         profile = self.request.user.profile
+        photos = models.Photo.objects.only('id', 'image', 'avatar_webp', 'avatar_jpeg', 'status', 'profile_id', 'order')
 
         return (
             models.Match.objects
             .filter(Q(profile1=profile) | Q(profile2=profile))
             .select_related('profile1', 'profile2')
+            .prefetch_related(
+                Prefetch('profile1__photos', queryset=photos),
+                Prefetch('profile2__photos', queryset=photos)
+            )
             .annotate(
                 unread_count=Case(
                     When(profile1_id=profile.pk, then=F('unread_count1')),
@@ -171,21 +104,8 @@ class MatchView(generics.ListAPIView):
                     output_field=IntegerField()
                 )
             )
-            .order_by('-last_notification_at')
         )
     
-    def list(self, request):
-        profile = self.request.user.profile
-
-        matches = []
-        for match in self.get_queryset():
-            other_profile = match.profile2 if match.profile1.pk == profile.pk else match.profile1
-            matches.append({
-                'profile': serializers.ProfileSerializer(other_profile, context={'request': request}).data,
-                'unread_count': match.unread_count
-            })
-        return Response(matches)
-    
     def delete(self, request, other_id):
         profile = request.user.profile
         other_profile = models.Profile.objects.get(user_id=other_id)
@@ -194,23 +114,34 @@ class MatchView(generics.ListAPIView):
         return Response(status=200)
 
 
+class PhotoView(APIView):
+    permission_classes = [permissions.hasProfile]
+
+    def perform_content_negotiation(self, request, force=False):
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, pk, version, size):
+        if size not in models.PHOTO_SIZES:
+            raise Http404
+        photo = get_object_or_404(models.Photo, pk=pk, status="ready")
+        if not photos.is_visible(photo, request.user.profile):
+            raise Http404
+        if version != photo.get_version(size):
+            return HttpResponseRedirect(photo.get_url(size))
+
+        file = photo.get_file(size, photos.get_format(request))
+        return photos.serve(request, file, photos.get_etag(file))
+
+
 class MessageView(generics.ListAPIView):
     serializer_class = serializers.MessageSerializer
     permission_classes = [permissions.hasProfile]
+    pagination_class = MessagePagination
 
     def get_queryset(self):
-        sender = models.Profile.objects.get(user=self.request.user)
-
-        recipient_id = self.kwargs.get("recipient_id")
-        recipient = models.Profile.objects.get(user_id=recipient_id)
-        try:
-            match = models.Match.get_between(
-                profile1=sender,
-                profile2=recipient
-            )
-            return models.Message.objects.filter(match=match).order_by("created_at")
-        except models.Match.DoesNotExist:
-            return models.Message.objects.none()
+        low_id, high_id = sorted((self.request.user.pk, self.kwargs.get("recipient_id")))
+        match = models.Match.objects.filter(profile1_id=low_id, profile2_id=high_id).values('pk')
+        return models.Message.objects.filter(match=Subquery(match))
 
 
 TOKEN_EXPIRY_MINUTES = 10
@@ -418,3 +349,10 @@ def accept_tos(request):
     user.accepted_tos = True
     user.save(update_fields=["accepted_tos"])
     return Response(status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@permission_classes([permissions.hasProfile])
+def unread_count(request):
+    total_unread = models.Match.get_total_unread(request.user.profile)
+    return Response({"total_unread": total_unread})
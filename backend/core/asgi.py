@@ -8,6 +8,11 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 django_asgi_app = get_asgi_application()
 
 from api.routing import websocket_urlpatterns
+from api.matchmaking import engine
+from api.photos import requeue_processing
+
+engine.start()
+requeue_processing()
 
 
 @database_sync_to_async
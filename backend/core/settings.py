@@ -213,6 +213,23 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Each ASGI/WSGI worker keeps every profile and swiped pair in numpy arrays (8-16 bytes per swipe
+# and ~150 bytes per profile, several times that while loading) and reloads them every 10 minutes.
+IN_MEMORY_MATCHMAKING = False
+
+ELO_RATING_PERIODS = False
+
+PHOTO_PROCESSING_WORKERS = 2
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["REDIS_URL"],
+    } if DEPLOY else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
 EMAIL_BACKEND = (
     'django.core.mail.backends.smtp.EmailBackend' if SMTP_EMAIL_BACKEND
     else 'django.core.mail.backends.console.EmailBackend'
@@ -21,7 +21,6 @@ const queryClient = new QueryClient({
 window.__TANSTACK_QUERY_CLIENT__ = queryClient;
 
 function App() {
-  const [iProfile, setIProfile] = useState(0);
   const [page, setPage] = useState({ name: 'home', params: {} });
   
   let navigateNaive = useNavigate();
@@ -50,8 +49,6 @@ function App() {
                       <MainContent
                         page={page}
                         navigate={navigate}
-                        iProfile={iProfile}
-                        setIProfile={setIProfile}
                       />
                     }
                   />
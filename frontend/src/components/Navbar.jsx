@@ -4,6 +4,7 @@ import { useNotification } from "../helpers/NotificationContext";
 import { useState } from "react";
 import { useQuery } from "@tanstack/react-query";
 import queriesOptions from "../helpers/queries";
+import Photo from "./Photo";
 
 const Navbar = ({ navigate }) => {
   const { user, logout, isAuthenticated } = useAuth();
@@ -16,7 +17,7 @@ const Navbar = ({ navigate }) => {
     enabled: !!user?.hasProfile,
   });
 
-  const photoBlob = profile?.photos?.[0]?.blob;
+  const photoUrl = profile?.photos?.[0]?.url;
 
   const NavItem = ({ label, target, onClick }) => (
     <a 
@@ -81,9 +82,9 @@ const Navbar = ({ navigate }) => {
               onClick={() => setMenuOpen(!menuOpen)}
               className="h-8 w-8 bg-gray-200 rounded-full flex items-center justify-center text-primary font-bold overflow-hidden border border-gray-300 focus:outline-none focus:ring-2 focus:ring-primary/20"
             >
-              {photoBlob ? (
-                <img 
-                  src={`data:image/jpeg;base64,${photoBlob}`} 
+              {photoUrl ? (
+                <Photo 
+                  url={photoUrl} 
                   alt={user.username} 
                   className="w-full h-full object-cover"
                 />
@@ -0,0 +1,25 @@
+import { useEffect, useState } from "react";
+import { useQuery } from "@tanstack/react-query";
+import queriesOptions from "../helpers/queries";
+
+const Photo = ({ url, ...props }) => {
+  const { data: blob } = useQuery({ ...queriesOptions.photo(url), enabled: !!url });
+  const [src, setSrc] = useState();
+
+  useEffect(() => {
+    if (!blob) return;
+    const objectUrl = URL.createObjectURL(blob);
+    setSrc(objectUrl);
+    return () => URL.revokeObjectURL(objectUrl);
+  }, [blob]);
+
+  return (
+    <img
+      src={src}
+      alt="Profile"
+      {...props}
+    />
+  );
+};
+
+export default Photo;
@@ -1,5 +1,6 @@
 import { useState } from "react";
 import { desnakify } from "../helpers/helpers";
+import Photo from "./Photo";
 
 const ProfileCard = ({ profile }) => {
   const [iPhoto, setIPhoto] = useState(0);
@@ -29,9 +30,9 @@ const ProfileCard = ({ profile }) => {
       {/* Photo Layer */}
       <div className="absolute inset-0 bg-gray-800 flex items-center justify-center">
         {photo ? (
-          <img
+          <Photo
             key={photo.id}
-            src={`data:image/jpeg;base64,${photo.blob}`}
+            url={photo.url}
             alt="Profile"
             className="w-full h-full object-cover"
           />
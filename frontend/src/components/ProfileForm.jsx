@@ -5,6 +5,7 @@ import { desnakify, requiredErrorMessage, setServerErrors } from "../helpers/hel
 import { useMutation, useQueryClient } from "@tanstack/react-query";
 import { useAuth } from "../helpers/AuthContext";
 import RangeSlider from 'react-range-slider-input';
+import Photo from "./Photo";
 
 // Defined outside to prevent re-renders losing focus
 const Section = ({ title, children }) => (
@@ -30,6 +31,17 @@ const ProfileForm = ({ profile, onCancel }) => {
     defaultValues: profile ?? {}
   });
   const photosRef = useRef();
+  const [keptPhotos, setKeptPhotos] = useState(profile?.photos ?? []);
+
+  const movePhoto = (i, delta) => setKeptPhotos(photos => {
+    const j = i + delta;
+    if (j < 0 || j >= photos.length) return photos;
+    const next = [...photos];
+    [next[i], next[j]] = [next[j], next[i]];
+    return next;
+  });
+
+  const removePhoto = i => setKeptPhotos(photos => photos.filter((_, j) => j !== i));
   
   // Watch birth_date to calculate current age for display
   const birthDate = watch("birth_date");
@@ -72,9 +84,16 @@ const ProfileForm = ({ profile, onCancel }) => {
       formData.append('younger_age_diff', ageDiffs[0]);
       formData.append('older_age_diff', ageDiffs[1]);
       
-      Array.from(photosRef.current.files).forEach(file => {
+      const files = Array.from(photosRef.current.files);
+      files.forEach(file => {
         formData.append('photos', file);
       });
+
+      // Existing photos are kept by ID, new uploads fill the "new" slots in order
+      if (isEditing) {
+        keptPhotos.forEach(photo => formData.append('photo_order', photo.id));
+        files.forEach(() => formData.append('photo_order', 'new'));
+      }
   
       if (isEditing)
         return api.patch('profile/', formData, {
@@ -249,6 +268,20 @@ const ProfileForm = ({ profile, onCancel }) => {
         </Section>
         
         <Section title="Photos">
+          {keptPhotos.length > 0 && (
+            <div className="grid grid-cols-3 gap-3">
+              {keptPhotos.map((photo, i) => (
+                <div key={photo.id} className="relative aspect-[3/4] rounded-lg overflow-hidden bg-gray-100">
+                  <Photo url={photo.url} className="w-full h-full object-cover" />
+                  <div className="absolute inset-x-0 bottom-0 flex justify-between p-1 bg-black/40 text-white text-xs font-semibold">
+                    <button type="button" onClick={() => movePhoto(i, -1)} disabled={i === 0} className="px-2 disabled:opacity-30">&larr;</button>
+                    <button type="button" onClick={() => removePhoto(i)} className="px-2">Remove</button>
+                    <button type="button" onClick={() => movePhoto(i, 1)} disabled={i === keptPhotos.length - 1} className="px-2 disabled:opacity-30">&rarr;</button>
+                  </div>
+                </div>
+              ))}
+            </div>
+          )}
           <div className="border-2 border-dashed border-gray-300 rounded-xl p-6 text-center hover:bg-gray-50 transition-colors">
             <input
               type="file"
@@ -46,10 +46,12 @@ export const AuthProvider = ({ children, resetPage }) => {
 
     if (!newUser.hasProfile || !newUser.isEmailVerified || !newUser.acceptedTos) return;
 
-    [queriesOptions.swipe, queriesOptions.matches, queriesOptions.profile].forEach(queryOptions => {
+    [queriesOptions.matches, queriesOptions.unreadCount, queriesOptions.profile].forEach(queryOptions => {
       queryClient.invalidateQueries({ queryKey: queryOptions.queryKey })
-      queryClient.prefetchQuery(queryOptions);
     });
+    queryClient.prefetchInfiniteQuery(queriesOptions.matches);
+    queryClient.prefetchQuery(queriesOptions.unreadCount);
+    queryClient.prefetchQuery(queriesOptions.profile);
   }
 
   const login = async (accessToken) => {
@@ -94,7 +96,7 @@ export const useAuth = () => {
   return context;
 };
 
-export const MainContent = ({ page, navigate, iProfile, setIProfile }) => {
+export const MainContent = ({ page, navigate }) => {
   const { isAuthenticated, isLoading, user } = useAuth();
 
   if (isLoading) return <Loading />;
@@ -106,7 +108,7 @@ export const MainContent = ({ page, navigate, iProfile, setIProfile }) => {
 
   switch (page.name) {
     case "home":
-      return <Home iProfile={iProfile} setIProfile={setIProfile} navigate={navigate} />;
+      return <Home navigate={navigate} />;
     case "profile":
       return <Profile navigate={navigate} />;
     case "matches":
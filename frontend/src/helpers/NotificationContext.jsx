@@ -3,6 +3,7 @@ import useWebSocket from "./useWebSocket";
 import { useAuth } from "./AuthContext";
 import { useQuery, useQueryClient } from "@tanstack/react-query";
 import queriesOptions from "./queries";
+import { getMatches, updateMatches } from "./helpers";
 
 const NotificationContext = createContext();
 
@@ -13,27 +14,35 @@ export const NotificationProvider = ({ navigate, children }) => {
   
   const enabled = isAuthenticated && user?.hasProfile && user?.isEmailVerified && user?.acceptedTos;
   
-  const matchesQuery = useQuery({...queriesOptions.matches, enabled});
+  const unreadCountQuery = useQuery({...queriesOptions.unreadCount, enabled});
   
   const handleUnmatch = id => {
+    queryClient.invalidateQueries({ queryKey: queriesOptions.unreadCount.queryKey });
     queryClient.setQueryData(
       queriesOptions.matches.queryKey,
-      prev => prev ? prev.filter(match => match.profile.user !== id) : prev
+      data => updateMatches(data, matches => matches.filter(match => match.profile.user !== id))
     );
   };
 
   const setActiveRecipientId = (recipientId) => {
     setActiveRecipientIdNaive(recipientId);
     
-    if (recipientId)
-      queryClient.setQueryData(queriesOptions.matches.queryKey, matches => {
-        if (!matches) return matches;
-        return matches.map(match => 
+    if (!recipientId) return;
+
+    const match = getMatches(queryClient.getQueryData(queriesOptions.matches.queryKey))
+      .find(match => match.profile.user === recipientId);
+    if (match)
+      queryClient.setQueryData(queriesOptions.unreadCount.queryKey, count => Math.max(0, (count || 0) - match.unread_count));
+    else
+      queryClient.invalidateQueries({ queryKey: queriesOptions.unreadCount.queryKey });
+
+    queryClient.setQueryData(queriesOptions.matches.queryKey, data => updateMatches(data, matches =>
+        matches.map(match => 
           match.profile.user === recipientId
             ? { ...match, unread_count: 0 }
             : match
-        );
-      });
+        )
+      ));
   };
 
   const { isOpen: socketIsOpen } = useWebSocket("notification/", {
@@ -48,12 +57,20 @@ export const NotificationProvider = ({ navigate, children }) => {
       }
 
       else if (notification.type === "message") {
-        if (activeRecipientId !== notification.id)
+        if (activeRecipientId !== notification.id) {
           queryClient.invalidateQueries({
             queryKey: ["message", notification.id]
           });
+          queryClient.setQueryData(queriesOptions.unreadCount.queryKey, count => (count || 0) + notification.count);
+        }
+
+        const matches = getMatches(queryClient.getQueryData(queriesOptions.matches.queryKey));
+        if (!matches.some(match => match.profile.user === notification.id)) {
+          queryClient.invalidateQueries({ queryKey: queriesOptions.matches.queryKey });
+          return;
+        }
 
-        queryClient.setQueryData(queriesOptions.matches.queryKey, matches => {
+        queryClient.setQueryData(queriesOptions.matches.queryKey, data => updateMatches(data, matches => {
           const iMatch = matches.findIndex(match => match.profile.user === notification.id);
           if (iMatch === -1) return matches;
 
@@ -61,25 +78,31 @@ export const NotificationProvider = ({ navigate, children }) => {
             ...matches[iMatch],
             unread_count: (activeRecipientId === notification.id)
               ? 0
-              : matches[iMatch].unread_count + 1
+              : matches[iMatch].unread_count + notification.count
           };
           
 
 
           return [updatedMatch, ...matches.filter((m, i) => i !== iMatch)];
-        });
+        }));
       }
 
-      else if (notification.type === "match")
+      else if (notification.type === "match") {
         queryClient.invalidateQueries({ queryKey: queriesOptions.matches.queryKey });
+        queryClient.invalidateQueries({ queryKey: queriesOptions.unreadCount.queryKey });
+      }
+
+      else if (notification.type === "photo_ready" || notification.type === "photo_failed") {
+        queryClient.invalidateQueries({ queryKey: queriesOptions.profile.queryKey });
+      }
     }
   });
   
-  const unreadCount = (matchesQuery.data || []).reduce((sum, match) => sum + (match.unread_count || 0), 0);
+  const unreadCount = unreadCountQuery.data || 0;
 
   const notificationValue = {
     unreadCount,
-    isLoading: matchesQuery.isLoading || !socketIsOpen,
+    isLoading: unreadCountQuery.isLoading || !socketIsOpen,
     handleUnmatch,
     setActiveRecipientId
   }
@@ -22,3 +22,20 @@ export const setServerErrors = (error, setError) => {
 export const requiredErrorMessage = (field) => {
     return `${desnakify(field)} is required.`
 };
+
+export const getMatches = data => data?.pages.flatMap(page => page.results) || [];
+
+export const updateMatches = (data, update) => {
+    if (!data) return data;
+    const matches = update(getMatches(data));
+    let start = 0;
+    return {
+      ...data,
+      pages: data.pages.map((page, i) => {
+        const end = i === data.pages.length - 1 ? matches.length : start + page.results.length;
+        const results = matches.slice(start, end);
+        start = end;
+        return { ...page, results };
+      })
+    };
+};
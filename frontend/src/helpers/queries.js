@@ -6,13 +6,6 @@ const queriesOptions = {
     queryFn: () => api.get('user/').then(res => res.data),
   },
 
-  swipe: {
-    queryKey: ['swipe'],
-    queryFn: () => api.get('swipe/').then(res => res.data),
-    refetchOnMount: query => query.state.data?.length === 0 ? 'always' : false,
-    refetchInterval: query => query.state.data?.length === 0 ? 20000 : false,
-  },
-
   profile: {
     queryKey: ['profile'],
     queryFn: () => api.get('profile/').then(res => res.data),
@@ -20,10 +13,30 @@ const queriesOptions = {
 
   matches: {
     queryKey: ["matches"],
-    queryFn: () => api.get('matches/').then(res => res.data),
+    queryFn: ({ pageParam }) => api.get(pageParam || 'matches/').then(res => res.data),
+    initialPageParam: null,
+    getNextPageParam: lastPage => lastPage.next,
+  },
+
+  unreadCount: {
+    queryKey: ["unreadCount"],
+    queryFn: () => api.get('unread-count/').then(res => res.data.total_unread),
   },
 
-  message: {},
+  photo: url => ({
+    queryKey: ["photo", url],
+    queryFn: () => api.get(url, {
+      baseURL: import.meta.env.VITE_API_URL,
+      headers: { Accept: "image/webp,image/jpeg" },
+      responseType: "blob",
+    }).then(res => res.data),
+    staleTime: Infinity,
+  }),
+
+  message: {
+    queryFn: () => null,
+    enabled: false,
+  },
 }
 
 export default queriesOptions;
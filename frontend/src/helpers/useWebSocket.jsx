@@ -3,7 +3,7 @@ import { auth } from "./api";
 import { useAuth } from "./AuthContext";
 import { useNavigate } from "react-router-dom";
 
-const useWebSocket = (pathname, { onopen, onclose, onmessage, enabled = true } = {}) => {
+const useWebSocket = (pathname, { onopen, onclose, onmessage, params, enabled = true } = {}) => {
   const { logout } = useAuth();
   const [isOpen, setIsOpen] = useState(false);
   const socketRef = useRef(null);
@@ -12,12 +12,14 @@ const useWebSocket = (pathname, { onopen, onclose, onmessage, enabled = true } =
   const onopenRef = useRef(onopen);
   const oncloseRef = useRef(onclose);
   const onmessageRef = useRef(onmessage);
+  const paramsRef = useRef(params);
 
   useEffect(() => {
     onopenRef.current = onopen;
     oncloseRef.current = onclose;
     onmessageRef.current = onmessage;
-  }, [onopen, onclose, onmessage]);
+    paramsRef.current = params;
+  }, [onopen, onclose, onmessage, params]);
 
   useEffect(() => {
     if (!enabled) return;
@@ -28,6 +30,7 @@ const useWebSocket = (pathname, { onopen, onclose, onmessage, enabled = true } =
     const base = new URL(import.meta.env.VITE_API_URL);
     base.protocol = base.protocol === 'https:' ? 'wss:' : 'ws:';
     base.pathname = `ws/${pathname}`;
+    base.search = new URLSearchParams(paramsRef.current || {}).toString();
     const accessToken = localStorage.getItem("access") || "";
     socketRef.current = new WebSocket(base.toString(), [`Bearer.${accessToken}`]);
 
@@ -1,34 +1,30 @@
 import React, { useEffect, useState } from "react";
 import ProfileCard from "../components/ProfileCard";
-import { useQuery, useMutation } from '@tanstack/react-query';
+import { useMutation } from '@tanstack/react-query';
 import Loading from "../components/Loading";
-import Error from "../components/Error";
-import queryOptions from "../helpers/queries";
 import useWebSocket from "../helpers/useWebSocket";
 import api from "../helpers/api";
 
-const Home = ({ iProfile, setIProfile }) => {
-  const swipeQuery = useQuery({
-    ...queryOptions.swipe,
+const Home = () => {
+  const [profiles, setProfiles] = useState(null);
+  const { socketRef, isOpen: socketIsOpen } = useWebSocket("swipe/", {
+    onopen: () => setProfiles(null),
+    onmessage: e => {
+      const data = JSON.parse(e.data);
+      if (data.type === "profiles")
+        setProfiles(prev => [...(prev || []), ...data.profiles]);
+    }
   });
-  const profiles = swipeQuery.data;
-  const { socketRef, isOpen: socketIsOpen } = useWebSocket("swipe/");
-  const isLoading = !socketIsOpen || swipeQuery.isFetching;
+  const isLoading = !socketIsOpen || profiles === null;
 
   // Animation State
   const [swipeDirection, setSwipeDirection] = useState(null); // 'left' | 'right' | null
 
-  const swipe = async (direction) => {
+  const swipe = (direction) => {
     if (!socketIsOpen) return;
-    const id = profiles[iProfile].user
+    const id = profiles[0].user
     socketRef.current.send(JSON.stringify({ id, direction }));
-    
-    if (iProfile >= profiles.length - 1) {
-      await swipeQuery.refetch();
-      setIProfile(0);
-    } else {
-      setIProfile(i => i + 1);
-    }
+    setProfiles(prev => prev.slice(1));
   };
 
   const handleSwipe = (direction) => {
@@ -46,7 +42,7 @@ const Home = ({ iProfile, setIProfile }) => {
   const [reason, setReason] = useState("");
   const reportReasons = ["Harassment/Inappropriate behavior", "Incorrect age", "Impersonation"];
   const reportMutation = useMutation({
-    mutationFn: () => api.post(`report-profile/${profiles[iProfile].user}/`, { reason }),
+    mutationFn: () => api.post(`report-profile/${profiles[0].user}/`, { reason }),
     onSuccess: () => {
       setShowReport(false);
       setReason("");
@@ -71,9 +67,8 @@ const Home = ({ iProfile, setIProfile }) => {
     };
     window.addEventListener('keydown', onKey);
     return () => window.removeEventListener('keydown', onKey);
-  }, [profiles, iProfile]); // Removed swipe dependency, using handleSwipe logic
+  }, [profiles]); // Removed swipe dependency, using handleSwipe logic
   
-  if (swipeQuery.isError) return <Error />;
   if (isLoading) return <Loading />;
   
   if (!profiles?.length) return (
@@ -142,7 +137,7 @@ const Home = ({ iProfile, setIProfile }) => {
              ${!swipeDirection ? 'translate-x-0 rotate-0' : ''}
            `}
          >
-           <ProfileCard profile={profiles[iProfile]} />
+           <ProfileCard key={profiles[0].user} profile={profiles[0]} />
            
            {/* Stamps */}
            {swipeDirection === 'right' && (
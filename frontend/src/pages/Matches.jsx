@@ -1,16 +1,19 @@
-import { useQuery } from "@tanstack/react-query";
+import { useInfiniteQuery } from "@tanstack/react-query";
 import Loading from "../components/Loading";
 import Error from "../components/Error";
+import Photo from "../components/Photo";
 import queriesOptions from "../helpers/queries";
+import { getMatches } from "../helpers/helpers";
 import React from "react";
 
 const Matches = ({ navigate }) => {
-  const { data: matches, isLoading, isError } = useQuery(queriesOptions.matches);
+  const { data, isLoading, isError, hasNextPage, fetchNextPage, isFetchingNextPage } = useInfiniteQuery(queriesOptions.matches);
+  const matches = getMatches(data);
 
   if (isLoading) return <Loading />;
   if (isError) return <Error />;
   
-  if (!matches || matches.length === 0) return (
+  if (matches.length === 0) return (
     <div className="absolute inset-0 flex flex-col items-center justify-center p-8 text-center text-gray-500">
       <div className="w-20 h-20 bg-gray-100 rounded-full flex items-center justify-center mb-4">
         <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" strokeWidth={1.5} stroke="currentColor" className="w-10 h-10">
@@ -31,9 +34,8 @@ const Matches = ({ navigate }) => {
           className="flex items-center gap-4 p-3 bg-white rounded-xl shadow-sm border border-gray-100 active:scale-[0.99] transition-transform cursor-pointer"
         >
           <div className="relative">
-             <img
-              src={`data:image/jpeg;base64,${profile.photos[0].blob}`}
-              alt="Profile"
+             <Photo
+              url={profile.photos[0]?.url}
               className="w-14 h-14 rounded-full object-cover border border-gray-100"
             />
             {unread_count > 0 && (
@@ -59,6 +61,15 @@ const Matches = ({ navigate }) => {
           </div>
         </div>
       ))}
+      {hasNextPage && (
+        <button
+          onClick={() => fetchNextPage()}
+          disabled={isFetchingNextPage}
+          className="w-full py-2 text-sm font-medium text-primary disabled:text-gray-400"
+        >
+          {isFetchingNextPage ? "Loading..." : "Load more"}
+        </button>
+      )}
     </div>
   );
 }
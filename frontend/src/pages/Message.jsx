@@ -1,10 +1,12 @@
-import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
+import { useInfiniteQuery, useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 import { useState, useEffect, useMemo, useRef } from "react";
 import queriesOptions from "../helpers/queries";
 import api from "../helpers/api";
 import Loading from "../components/Loading";
 import useWebSocket from "../helpers/useWebSocket";
 import { useNotification } from "../helpers/NotificationContext";
+import { getMatches, updateMatches } from "../helpers/helpers";
+import Photo from "../components/Photo";
 
 const Message = ({ recipientId, navigate }) => {
   recipientId = parseInt(recipientId);
@@ -18,9 +20,9 @@ const Message = ({ recipientId, navigate }) => {
   const reportReasons = ["Harassment/Inappropriate behavior", "Incorrect age", "Impersonation"];
   const { handleUnmatch, setActiveRecipientId, isLoading: notificationIsLoading } = useNotification();
 
-  const matchesQuery = useQuery(queriesOptions.matches);
+  const matchesQuery = useInfiniteQuery(queriesOptions.matches);
   const recipientProfile = useMemo(
-    () => (matchesQuery.data || []).find(i => i.profile.user === recipientId)?.profile,
+    () => getMatches(matchesQuery.data).find(i => i.profile.user === recipientId)?.profile,
     [recipientId]
   )
 
@@ -32,30 +34,67 @@ const Message = ({ recipientId, navigate }) => {
     };
   }, [recipientId, notificationIsLoading]);
 
+  const queryClient = useQueryClient();
+
   const messagesKey = ["message", recipientId];
   const messagesQuery = useQuery({
     ...queriesOptions.message,
     queryKey: messagesKey,
-    queryFn: () => api.get(`message/${recipientId}/`).then(res => res.data),
   });
+  const lastMessageId = messagesQuery.data?.results.at(-1)?.id;
 
-  const queryClient = useQueryClient();
+  const [isLoadingOlder, setIsLoadingOlder] = useState(false);
+  const loadOlder = () => {
+    const firstMessage = messagesQuery.data?.results[0];
+    if (!firstMessage) return;
+    setIsLoadingOlder(true);
+    socketRef.current.send(JSON.stringify({ type: "history", before: firstMessage.id }));
+  };
+
+  const addHistory = ({ messages, has_more, before, after }) => {
+    queryClient.setQueryData(messagesKey, data => {
+      if (before != null)
+        return { results: [...messages, ...data.results], hasOlder: has_more };
+      if (after != null) {
+        const ids = new Set(data.results.map(({ id }) => id));
+        return { ...data, results: [...data.results, ...messages.filter(({ id }) => !ids.has(id))] };
+      }
+      return { results: messages, hasOlder: has_more };
+    });
+
+    if (before != null)
+      setIsLoadingOlder(false);
+    if (after != null && has_more)
+      socketRef.current.send(JSON.stringify({ type: "history", after: messages.at(-1).id }));
+  };
 
   const { socketRef, isOpen: socketIsOpen } = useWebSocket(`message/${recipientId}/`, {
+    params: lastMessageId ? { after: lastMessageId } : {},
     onmessage: e => {
-      const message = JSON.parse(e.data);
-      queryClient.setQueryData(messagesKey, messages => [...(messages || []), message]);
+      const frame = JSON.parse(e.data);
+      if (frame.type === "history") {
+        addHistory(frame);
+        return;
+      }
+      if (frame.type !== "message") return;
+
+      const { message } = frame;
+      queryClient.setQueryData(messagesKey, data => {
+        if (!data) return data;
+        if (data.results.some(({ id }) => id === message.id)) return data;
+        return { ...data, results: [...data.results, message] };
+      });
 
-      queryClient.setQueryData(queriesOptions.matches.queryKey, matches => {
+      queryClient.setQueryData(queriesOptions.matches.queryKey, data => updateMatches(data, matches => {
         const iMatch = matches.findIndex(match => match.profile.user === recipientId);
         if (iMatch === -1 || iMatch == 0) return matches;
 
         return [matches[iMatch], ...matches.filter((m, i) => i !== iMatch)];
-      });
+      }));
     }
   });
 
-  const isLoading = !socketIsOpen || messagesQuery.isLoading;
+  const isLoading = !socketIsOpen || !messagesQuery.data;
 
   // Auto-scroll to bottom
   const firstRenderRef = useRef(true);
@@ -64,7 +103,7 @@ const Message = ({ recipientId, navigate }) => {
   
     messagesEndRef.current?.scrollIntoView(firstRenderRef.current ? {} : { behavior: "smooth" });
     firstRenderRef.current = false;
-  }, [isLoading, messagesQuery.data]);
+  }, [isLoading, lastMessageId]);
 
   const sendMessage = e => {
     e.preventDefault();
@@ -168,8 +207,8 @@ const Message = ({ recipientId, navigate }) => {
           </button>
           {recipientProfile && (
              <div className="flex items-center gap-2">
-                <img 
-                  src={`data:image/jpeg;base64,${recipientProfile.photos[0].blob}`} 
+                <Photo 
+                  url={recipientProfile.photos[0]?.url} 
                   className="w-8 h-8 rounded-full object-cover" 
                   alt=""
                 />
@@ -225,10 +264,19 @@ const Message = ({ recipientId, navigate }) => {
 
       {/* Messages Area */}
       <div className="flex-1 overflow-y-auto p-4 space-y-3 bg-gray-50">
-        {(messagesQuery.data || []).map(({ sender, text, created_at }, i) => {
+        {messagesQuery.data?.hasOlder && (
+          <button
+            onClick={loadOlder}
+            disabled={isLoadingOlder}
+            className="w-full py-1 text-xs font-medium text-primary disabled:text-gray-400"
+          >
+            {isLoadingOlder ? "Loading..." : "Load older messages"}
+          </button>
+        )}
+        {(messagesQuery.data?.results || []).map(({ id, sender, text, created_at }) => {
           const isMe = sender !== recipientId;
           return (
-            <div key={i} className={`flex flex-col ${isMe ? 'items-end' : 'items-start'}`}>
+            <div key={id} className={`flex flex-col ${isMe ? 'items-end' : 'items-start'}`}>
               <div 
                 className={`max-w-[80%] px-4 py-2 rounded-2xl text-sm ${
                   isMe 